@@ -0,0 +1,220 @@
+"""
+Rekap absensi bulanan (tabel attendance_monthly).
+
+Laporan bulanan membaca satu baris per user per bulan, bukan memindai
+seluruh event di tabel attendance. Rekap diperbarui inkremental di
+transaksi yang sama dengan submit absensi (lihat record_attendance), dan
+bisa dibangun ulang dari attendance_days + schedules:
+
+    python attendance_rollup.py rebuild                 # semua bulan
+    python attendance_rollup.py rebuild --month 2025-09 # satu bulan
+
+Rebuild aman dijalankan saat API hidup: setiap bulan dibangun ulang dalam
+satu transaksi yang lebih dulu mengunci baris attendance_days bulan itu
+(SELECT ... FOR UPDATE). Submit yang menyentuh bulan yang sama menunggu
+sampai rekapnya selesai ditulis (atau sebaliknya), sehingga update
+inkremental tidak hilang dan tidak terhitung dua kali.
+"""
+import argparse
+import datetime
+import os
+import sys
+
+from sqlalchemy import and_, delete, func, insert, literal_column, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from models import AttendanceDay, AttendanceMonthly, Schedule, User
+
+# Absen masuk lewat dari start_time + toleransi ini dihitung terlambat
+LATE_TOLERANCE_MINUTES = int(os.getenv("LATE_TOLERANCE_MINUTES", "0"))
+REBUILD_CHUNK_SIZE = 1000
+
+
+def local_utc_offset() -> datetime.timedelta:
+    """Selisih waktu lokal server terhadap UTC (masuk_at/pulang_at disimpan dalam UTC)"""
+    now = datetime.datetime.now()
+    return datetime.timedelta(minutes=round((now - datetime.datetime.utcnow()).total_seconds() / 60))
+
+
+def month_start(day: datetime.date) -> datetime.date:
+    return day.replace(day=1)
+
+
+def late_minutes(shift_start: datetime.datetime, masuk_at: datetime.datetime) -> int:
+    """Menit keterlambatan (waktu lokal); negatif jika datang lebih awal"""
+    return int((masuk_at - shift_start).total_seconds() // 60)
+
+
+def is_late(shift_start: datetime.datetime, masuk_at: datetime.datetime) -> bool:
+    return late_minutes(shift_start, masuk_at) > LATE_TOLERANCE_MINUTES
+
+
+def masuk_statement(user_id: int, work_date: datetime.date, late: bool):
+    """Upsert rekap saat absen masuk: satu hari kerja lagi, shift terbuka sampai absen pulang"""
+    stmt = mysql_insert(AttendanceMonthly).values(
+        user_id=user_id,
+        month_start=month_start(work_date),
+        days_worked=1,
+        late_count=int(late),
+        worked_minutes=0,
+        missing_checkouts=1,
+    )
+    return stmt.on_duplicate_key_update(
+        days_worked=AttendanceMonthly.days_worked + 1,
+        late_count=AttendanceMonthly.late_count + int(late),
+        missing_checkouts=AttendanceMonthly.missing_checkouts + 1,
+    )
+
+
+def pulang_statement(user_id: int, work_date: datetime.date):
+    """
+    Update rekap saat absen pulang. Durasi kerja dihitung di DB dari
+    attendance_days (harus dijalankan setelah pulang_at di-update).
+    """
+    worked = func.timestampdiff(literal_column("MINUTE"), AttendanceDay.masuk_at, AttendanceDay.pulang_at)
+    return (
+        update(AttendanceMonthly)
+        .where(
+            AttendanceMonthly.user_id == user_id,
+            AttendanceMonthly.month_start == month_start(work_date),
+            AttendanceDay.user_id == user_id,
+            AttendanceDay.work_date == work_date,
+        )
+        .values(
+            worked_minutes=AttendanceMonthly.worked_minutes + worked,
+            missing_checkouts=func.greatest(AttendanceMonthly.missing_checkouts - 1, 0),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def report_query(month: datetime.date):
+    """Rekap satu bulan join users; filter (manager/departemen) ditambahkan pemanggil"""
+    return (
+        select(
+            AttendanceMonthly.user_id, User.user_name, User.full_name, AttendanceMonthly.days_worked,
+            AttendanceMonthly.late_count, AttendanceMonthly.worked_minutes, AttendanceMonthly.missing_checkouts,
+        )
+        .join(User, User.id == AttendanceMonthly.user_id)
+        .where(AttendanceMonthly.month_start == month_start(month))
+        .order_by(User.full_name, User.id)
+    )
+
+
+def report_row(row) -> dict:
+    return {
+        "user_id": row.user_id,
+        "user_name": row.user_name,
+        "full_name": row.full_name,
+        "days_worked": row.days_worked,
+        "late_count": row.late_count,
+        "total_hours": round(row.worked_minutes / 60.0, 2),
+        "missing_checkouts": row.missing_checkouts,
+    }
+
+
+def _next_month(day: datetime.date) -> datetime.date:
+    return (month_start(day) + datetime.timedelta(days=32)).replace(day=1)
+
+
+def _month_range(month: str):
+    start = datetime.datetime.strptime(month, "%Y-%m").date()
+    return start, _next_month(start)
+
+
+def rebuild(db, start: datetime.date = None, end: datetime.date = None) -> int:
+    """
+    Bangun ulang rekap setiap bulan yang beririsan dengan [start, end) (semua
+    jika None) dari attendance_days + schedules, satu transaksi per bulan.
+    Return jumlah baris rekap yang ditulis.
+    """
+    if start is None or end is None:
+        first_day, last_day = db.execute(
+            select(func.min(AttendanceDay.work_date), func.max(AttendanceDay.work_date))
+        ).one()
+        first_month, last_month = db.execute(
+            select(func.min(AttendanceMonthly.month_start), func.max(AttendanceMonthly.month_start))
+        ).one()
+        db.rollback()
+        firsts = [d for d in (first_day, first_month) if d is not None]
+        lasts = [d for d in (last_day, last_month) if d is not None]
+        if not firsts:
+            return 0
+        start = start or min(firsts)
+        end = end or _next_month(max(lasts))
+
+    written = 0
+    month = month_start(start)
+    while month < end:
+        written += _rebuild_month(db, month)
+        month = _next_month(month)
+    return written
+
+
+def _rebuild_month(db, month: datetime.date) -> int:
+    day_filter = (AttendanceDay.work_date >= month, AttendanceDay.work_date < _next_month(month))
+    # Kunci attendance_days bulan ini lebih dulu, dengan urutan yang sama seperti
+    # record_attendance (attendance_days lalu attendance_monthly) supaya tidak deadlock.
+    # Submit yang menulis bulan ini menunggu sampai transaksi ini commit.
+    db.execute(select(AttendanceDay.id).where(*day_filter).with_for_update())
+
+    query = (
+        select(
+            AttendanceDay.user_id, AttendanceDay.work_date, AttendanceDay.masuk_at, AttendanceDay.pulang_at,
+            func.min(Schedule.start_time).label("start_time"),
+        )
+        .outerjoin(Schedule, and_(
+            Schedule.user_id == AttendanceDay.user_id,
+            Schedule.shift_date == AttendanceDay.work_date,
+        ))
+        .where(AttendanceDay.masuk_at.isnot(None), *day_filter)
+        .group_by(AttendanceDay.id)
+        .execution_options(yield_per=REBUILD_CHUNK_SIZE)
+    )
+
+    offset = local_utc_offset()
+    totals = {}
+    for row in db.execute(query):
+        summary = totals.get(row.user_id)
+        if summary is None:
+            summary = totals[row.user_id] = {
+                "user_id": row.user_id, "month_start": month,
+                "days_worked": 0, "late_count": 0, "worked_minutes": 0, "missing_checkouts": 0,
+            }
+        summary["days_worked"] += 1
+        if row.start_time is not None:
+            shift_start = datetime.datetime.combine(row.work_date, row.start_time)
+            summary["late_count"] += is_late(shift_start, row.masuk_at + offset)
+        if row.pulang_at is None:
+            summary["missing_checkouts"] += 1
+        else:
+            summary["worked_minutes"] += int((row.pulang_at - row.masuk_at).total_seconds() // 60)
+
+    db.execute(delete(AttendanceMonthly).where(AttendanceMonthly.month_start == month))
+    rows = list(totals.values())
+    for i in range(0, len(rows), REBUILD_CHUNK_SIZE):
+        db.execute(insert(AttendanceMonthly), rows[i:i + REBUILD_CHUNK_SIZE])
+    db.commit()
+    return len(rows)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Rekap absensi bulanan")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("rebuild", help="Bangun ulang attendance_monthly dari attendance_days")
+    p.add_argument("--month", help="Hanya bulan ini (YYYY-MM)")
+    args = parser.parse_args(argv)
+
+    from database import SessionLocal
+
+    start, end = _month_range(args.month) if args.month else (None, None)
+    db = SessionLocal()
+    try:
+        written = rebuild(db, start, end)
+    finally:
+        db.close()
+    print(f"Rekap bulanan dibangun ulang: {written} baris.")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
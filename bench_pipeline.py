@@ -0,0 +1,121 @@
+"""
+Harness perbandingan akurasi/latensi pipeline verifikasi wajah.
+
+Untuk setiap gambar di folder, embedding baseline dihitung dengan cara lama
+(decode resolusi penuh, HOG di seluruh gambar). Setiap konfigurasi reduksi
+lalu dibandingkan terhadap baseline: latensi, tingkat deteksi, jarak embedding
+ke baseline, dan persentase hasil yang tetap cocok pada tolerance verifikasi.
+
+Contoh:
+    python bench_pipeline.py foto_uji/ --reduce 1 2 4 8 --repeat 3
+"""
+import argparse
+import glob
+import os
+import statistics
+import time
+
+import cv2
+import face_recognition
+import numpy as np
+
+import face_pipeline
+
+TOLERANCE = 0.5
+
+
+def baseline_embedding(contents: bytes):
+    image = cv2.imdecode(np.frombuffer(contents, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return None
+    rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    face_locations = face_recognition.face_locations(rgb_image)
+    if not face_locations:
+        return None
+    return face_recognition.face_encodings(rgb_image, face_locations)[0]
+
+
+def timed(fn, repeat):
+    """Jalankan fn sebanyak repeat kali, return (hasil terakhir, median ms)"""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        durations.append((time.perf_counter() - start) * 1000.0)
+    return result, statistics.median(durations)
+
+
+def load_images(folder):
+    paths = []
+    for pattern in ("*.jpg", "*.jpeg", "*.png"):
+        paths.extend(glob.glob(os.path.join(folder, pattern)))
+    images = []
+    for path in sorted(paths):
+        with open(path, "rb") as f:
+            images.append((os.path.basename(path), f.read()))
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", help="Folder berisi foto uji (jpg/png)")
+    parser.add_argument("--reduce", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--margin", type=float, default=face_pipeline.FACE_ROI_MARGIN)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    images = load_images(args.folder)
+    if not images:
+        print(f"Tidak ada gambar di {args.folder}")
+        return
+
+    face_pipeline.warmup()
+
+    baselines = {}
+    baseline_ms = []
+    for name, contents in images:
+        embedding, ms = timed(lambda: baseline_embedding(contents), args.repeat)
+        baselines[name] = embedding
+        baseline_ms.append(ms)
+
+    detected = sum(1 for e in baselines.values() if e is not None)
+    print(f"{len(images)} gambar, wajah terdeteksi di baseline: {detected}")
+    print(f"{'konfigurasi':<22}{'median ms':>10}{'p95 ms':>10}{'deteksi':>9}{'jarak':>9}{'cocok':>8}")
+    print(f"{'baseline (lama)':<22}{statistics.median(baseline_ms):>10.1f}"
+          f"{np.percentile(baseline_ms, 95):>10.1f}{detected:>9}{0.0:>9.3f}{'100%':>8}")
+
+    configs = []
+    for reduce in args.reduce:
+        configs.append((f"reduce={reduce} roi", reduce, True))
+        if reduce > 1:
+            configs.append((f"reduce={reduce} kecil", reduce, False))
+
+    for label, reduce, full_res in configs:
+        latencies, distances = [], []
+        found = agree = 0
+        for name, contents in images:
+            (result, embedding, _), ms = timed(
+                lambda: face_pipeline.encode_face(
+                    contents, reduce=reduce, margin=args.margin, full_res=full_res, gate=False
+                ),
+                args.repeat,
+            )
+            latencies.append(ms)
+            if result != face_pipeline.STATUS_OK:
+                continue
+            found += 1
+            if baselines[name] is not None:
+                distance = float(np.linalg.norm(baselines[name] - embedding))
+                distances.append(distance)
+                if distance <= TOLERANCE:
+                    agree += 1
+
+        mean_distance = statistics.mean(distances) if distances else float("nan")
+        agree_pct = f"{agree / detected * 100:.0f}%" if detected else "-"
+        print(f"{label:<22}{statistics.median(latencies):>10.1f}{np.percentile(latencies, 95):>10.1f}"
+              f"{found:>9}{mean_distance:>9.3f}{agree_pct:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,47 @@
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from typing import Generator
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
-from models import User
+from database import get_async_db
 from auth import SECRET_KEY, ALGORITHM
+from principal_cache import Principal, principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+async def authenticate_token(db: AsyncSession, token: str) -> Optional[Principal]:
+    """Decode JWT dan ambil Principal-nya; None jika token atau user tidak valid"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        return None
+    username: str = payload.get("sub")
+    if username is None:
+        return None
+    return await principal_cache.get(db, username)
+
 
-    user = db.query(User).filter(User.user_name == username).first()
-    if user is None:
-        raise credentials_exception
-    return user
+async def get_current_user(db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)) -> Principal:
+    principal = await authenticate_token(db, token)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return principal
 
 
-def role_admin_required(current_user: User = Depends(get_current_user)) -> User:
+async def role_admin_required(current_user: Principal = Depends(get_current_user)) -> Principal:
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin role required")
     return current_user
 
 
-def role_manager_or_admin_required(current_user: User = Depends(get_current_user)) -> User:
+async def role_manager_or_admin_required(current_user: Principal = Depends(get_current_user)) -> Principal:
     if current_user.role not in ["admin", "kepala_ruangan", "staff"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Manager or Admin role required")
     return current_user
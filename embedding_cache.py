@@ -0,0 +1,108 @@
+"""
+Cache embedding wajah per proses.
+
+Embedding user tidak dibaca dari DB di setiap verifikasi: embedding
+disimpan sebagai array float32 (read-only) per user_id
+bersama embedding_version. Setiap kali embedding diubah, embedding_version
+dinaikkan (lihat set_user_embedding), sehingga proses lain yang masih memegang
+versi lama otomatis melakukan reload saat versinya tidak cocok.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import embedding_codec
+from models import User
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "50000"))
+
+
+class EmbeddingCache:
+    def __init__(self, max_entries: int = EMBEDDING_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # user_id -> (version, np.ndarray float32)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, db: AsyncSession, user_id: int, version: int) -> Optional[np.ndarray]:
+        """
+        Ambil embedding user; baca dari DB hanya jika belum ada atau versinya berbeda.
+        Return None jika user belum mendaftarkan wajah (atau embedding dari model lain).
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        result = await db.execute(
+            select(User.embedding, User.embedding_model, User.embedding_version).where(User.id == user_id)
+        )
+        row = result.first()
+        if row is None or row.embedding is None or not embedding_codec.is_compatible(row.embedding_model):
+            self.invalidate(user_id)
+            return None
+
+        # frombuffer di atas bytes dari driver: sudah float32 dan read-only, tanpa copy
+        embedding = np.asarray(row.embedding, dtype=np.float32)
+        self.put(user_id, row.embedding_version, embedding)
+        return embedding
+
+    def put(self, user_id: int, version: int, embedding: np.ndarray):
+        with self._lock:
+            self._entries[user_id] = (version, embedding)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+embedding_cache = EmbeddingCache()
+
+
+def embedding_update_values(user_id: int, current_version: int, embedding) -> dict:
+    """
+    Parameter UPDATE untuk mengganti embedding user (dipakai juga oleh bulk update
+    di seed_db): embedding_version selalu dinaikkan agar cache di semua proses ikut invalid.
+    """
+    vector = np.asarray(embedding, dtype=embedding_codec.EMBEDDING_DTYPE)
+    return {
+        "id": user_id,
+        "embedding": vector,
+        "embedding_model": embedding_codec.EMBEDDING_MODEL,
+        "embedding_norm": embedding_codec.norm(vector),
+        "embedding_version": (current_version or 0) + 1,
+    }
+
+
+def set_user_embedding(user: User, embedding):
+    """Ganti embedding satu user (re-enrollment admin) lewat ORM object"""
+    values = embedding_update_values(user.id, user.embedding_version, embedding)
+    user.embedding = values["embedding"]
+    user.embedding_model = values["embedding_model"]
+    user.embedding_norm = values["embedding_norm"]
+    user.embedding_version = values["embedding_version"]
+    embedding_cache.invalidate(user.id)
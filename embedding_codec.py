@@ -0,0 +1,55 @@
+"""
+Representasi biner embedding wajah di database.
+
+Embedding disimpan sebagai 128 float32 little-endian (512 byte) di kolom
+VARBINARY, bukan JSON teks (~2.5 KB dan harus di-parse setiap dibaca).
+PackedEmbedding mengembalikan array NumPy hasil np.frombuffer langsung di
+atas bytes dari driver (tanpa copy, read-only). Kolom pendamping:
+embedding_model (model encoder yang menghasilkan vektor) dan embedding_norm
+(norm L2, dipakai embedding_index tanpa menghitung ulang).
+"""
+import os
+
+import numpy as np
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+EMBEDDING_DIM = 128
+EMBEDDING_DTYPE = np.dtype("<f4")
+# Tag model encoder; embedding dengan tag berbeda tidak dibandingkan
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "dlib_resnet_v1")
+
+
+def pack(embedding) -> bytes:
+    vector = np.asarray(embedding, dtype=EMBEDDING_DTYPE)
+    if vector.shape != (EMBEDDING_DIM,):
+        raise ValueError(f"Embedding harus {EMBEDDING_DIM} dimensi, bukan {vector.shape}")
+    return vector.tobytes()
+
+
+def unpack(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=EMBEDDING_DTYPE)
+
+
+def norm(embedding) -> float:
+    vector = np.asarray(embedding, dtype=np.float32)
+    return float(np.sqrt(np.dot(vector, vector)))
+
+
+def is_compatible(model) -> bool:
+    """Embedding tanpa tag (hasil migrasi lama) dianggap dari model saat ini"""
+    return model is None or model == EMBEDDING_MODEL
+
+
+class PackedEmbedding(TypeDecorator):
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, bytes):
+            return value
+        return pack(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return unpack(value)
@@ -0,0 +1,158 @@
+"""
+Index embedding untuk identifikasi 1:N (mode kiosk).
+
+Semua embedding yang terdaftar disimpan dalam satu matriks float32 (N x 128)
+beserta kuadrat norm per baris, sehingga pencarian cukup satu perkalian
+matriks-vektor:  |m - v|^2 = |m|^2 - 2 m.v + |v|^2.
+Refresh bersifat inkremental: hanya baris dengan embedding_version yang
+berubah yang dibaca ulang dari DB. Refresh dijalankan satu per satu, jadi
+request yang bersamaan saat index kadaluarsa tidak masing-masing memindai
+seluruh tabel.
+"""
+import asyncio
+import os
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from embedding_codec import EMBEDDING_DIM, EMBEDDING_MODEL
+from models import User
+
+EMBEDDING_INDEX_REFRESH_SECONDS = float(os.getenv("EMBEDDING_INDEX_REFRESH_SECONDS", "30"))
+_LOAD_CHUNK = 1000
+
+# User yang masuk index: punya embedding dari model yang sedang dipakai
+_INDEXED = (
+    User.embedding.isnot(None),
+    or_(User.embedding_model.is_(None), User.embedding_model == EMBEDDING_MODEL),
+)
+
+
+class EmbeddingIndex:
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self._matrix = np.empty((0, dim), dtype=np.float32)
+        self._sq_norms = np.empty(0, dtype=np.float32)
+        self._user_ids = np.empty(0, dtype=np.int64)
+        self._size = 0
+        self._row_of = {}  # user_id -> index baris
+        self._versions = {}  # user_id -> embedding_version
+        self._lock = threading.Lock()
+        self._refresh_lock = asyncio.Lock()
+        self.last_refresh = 0.0
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self, needed: int):
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 256)
+        matrix = np.empty((new_capacity, self.dim), dtype=np.float32)
+        sq_norms = np.empty(new_capacity, dtype=np.float32)
+        user_ids = np.empty(new_capacity, dtype=np.int64)
+        matrix[:self._size] = self._matrix[:self._size]
+        sq_norms[:self._size] = self._sq_norms[:self._size]
+        user_ids[:self._size] = self._user_ids[:self._size]
+        self._matrix, self._sq_norms, self._user_ids = matrix, sq_norms, user_ids
+
+    def _set_row(self, user_id: int, version: int, embedding, norm=None):
+        row = self._row_of.get(user_id)
+        if row is None:
+            self._grow(self._size + 1)
+            row = self._size
+            self._size += 1
+            self._row_of[user_id] = row
+            self._user_ids[row] = user_id
+        self._matrix[row] = embedding
+        if norm is None:
+            self._sq_norms[row] = float(np.dot(self._matrix[row], self._matrix[row]))
+        else:
+            self._sq_norms[row] = norm * norm
+        self._versions[user_id] = version
+
+    def _remove_row(self, user_id: int):
+        # Tukar dengan baris terakhir supaya matriks tetap rapat
+        row = self._row_of.pop(user_id)
+        self._versions.pop(user_id, None)
+        last = self._size - 1
+        if row != last:
+            moved_user = int(self._user_ids[last])
+            self._matrix[row] = self._matrix[last]
+            self._sq_norms[row] = self._sq_norms[last]
+            self._user_ids[row] = moved_user
+            self._row_of[moved_user] = row
+        self._size = last
+
+    async def refresh(self, db: AsyncSession) -> int:
+        """Sinkronkan index dengan DB; return jumlah baris yang berubah"""
+        result = await db.execute(select(User.id, User.embedding_version).where(*_INDEXED))
+        current = dict(result.all())
+        changed = [uid for uid, version in current.items() if self._versions.get(uid) != version]
+        removed = [uid for uid in self._row_of if uid not in current]
+
+        loaded = []
+        for i in range(0, len(changed), _LOAD_CHUNK):
+            chunk = changed[i:i + _LOAD_CHUNK]
+            # Filter diulang: embedding bisa dihapus atau diganti model lain di antara dua query
+            result = await db.execute(
+                select(User.id, User.embedding_version, User.embedding, User.embedding_norm)
+                .where(User.id.in_(chunk), *_INDEXED)
+            )
+            loaded.extend(row for row in result if row.embedding is not None)
+        loaded_ids = {row.id for row in loaded}
+        removed.extend(uid for uid in changed if uid not in loaded_ids and uid in self._row_of)
+
+        with self._lock:
+            for uid in removed:
+                self._remove_row(uid)
+            for row in loaded:
+                self._set_row(row.id, row.embedding_version, row.embedding, row.embedding_norm)
+            self.last_refresh = time.monotonic()
+
+        return len(removed) + len(loaded)
+
+    async def refresh_if_stale(self, db: AsyncSession, max_age: float = EMBEDDING_INDEX_REFRESH_SECONDS) -> int:
+        if time.monotonic() - self.last_refresh < max_age:
+            return 0
+        async with self._refresh_lock:
+            # Request lain mungkin sudah me-refresh selama menunggu lock
+            if time.monotonic() - self.last_refresh < max_age:
+                return 0
+            return await self.refresh(db)
+
+    def search(self, embedding, k: int = 1):
+        """
+        Cari k user terdekat; return list (user_id, jarak euclidean) terurut naik.
+        """
+        query = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            size = self._size
+            if size == 0:
+                return []
+            sq_dist = self._sq_norms[:size] - 2.0 * (self._matrix[:size] @ query) + float(np.dot(query, query))
+            user_ids = self._user_ids[:size].copy()
+
+        k = min(k, size)
+        if k < size:
+            nearest = np.argpartition(sq_dist, k - 1)[:k]
+            nearest = nearest[np.argsort(sq_dist[nearest])]
+        else:
+            nearest = np.argsort(sq_dist)
+
+        distances = np.sqrt(np.maximum(sq_dist[nearest], 0.0))
+        return [(int(user_ids[i]), float(d)) for i, d in zip(nearest, distances)]
+
+    def stats(self) -> dict:
+        return {
+            "size": self._size,
+            "capacity": self._matrix.shape[0],
+            "last_refresh_age_seconds": time.monotonic() - self.last_refresh if self.last_refresh else None,
+        }
+
+
+embedding_index = EmbeddingIndex()
@@ -0,0 +1,147 @@
+"""
+Penyimpanan embedding wajah dalam format biner ringkas (pengganti face_embeddings.json).
+
+Format file:
+    header 16 byte : magic b"FEMB", versi (uint16), dim (uint16), panjang nama (uint32), reserved (uint32)
+    record         : nama (utf-8, 64 byte, di-pad NUL) + embedding float32 little-endian (dim)
+
+Record hanya ditambahkan di akhir file (append); jika nama yang sama muncul
+lebih dari sekali, record terakhir yang berlaku. File dibaca dengan np.memmap
+sehingga load tidak perlu mem-parse seluruh isi file.
+
+Perintah:
+    python embedding_store.py import face_embeddings.json face_embeddings.bin
+    python embedding_store.py export face_embeddings.bin face_embeddings.json
+    python embedding_store.py compact face_embeddings.bin
+"""
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+MAGIC = b"FEMB"
+FORMAT_VERSION = 1
+EMBEDDING_DIM = 128
+NAME_BYTES = 64
+HEADER = struct.Struct("<4sHHII")
+HEADER_SIZE = HEADER.size
+
+RECORD_DTYPE = np.dtype([("name", f"S{NAME_BYTES}"), ("embedding", "<f4", (EMBEDDING_DIM,))])
+
+
+def _write_header(f):
+    f.write(HEADER.pack(MAGIC, FORMAT_VERSION, EMBEDDING_DIM, NAME_BYTES, 0))
+
+
+def _check_header(path: str):
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        raise ValueError(f"{path}: header tidak lengkap")
+    magic, version, dim, name_bytes, _ = HEADER.unpack(raw)
+    if magic != MAGIC or version != FORMAT_VERSION or dim != EMBEDDING_DIM or name_bytes != NAME_BYTES:
+        raise ValueError(f"{path}: bukan file embedding versi {FORMAT_VERSION} (dim {EMBEDDING_DIM})")
+
+
+def _encode_name(name: str) -> bytes:
+    encoded = name.encode("utf-8")
+    if len(encoded) > NAME_BYTES:
+        raise ValueError(f"Nama terlalu panjang untuk disimpan (maks {NAME_BYTES} byte): {name}")
+    return encoded
+
+
+def count_records(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    return max(0, (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize)
+
+
+def append_records(path: str, items):
+    """Tambahkan (nama, embedding) ke akhir file; file dibuat jika belum ada"""
+    items = list(items)
+    records = np.empty(len(items), dtype=RECORD_DTYPE)
+    for i, (name, embedding) in enumerate(items):
+        records[i]["name"] = _encode_name(name)
+        records[i]["embedding"] = np.asarray(embedding, dtype=np.float32)
+
+    is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, "ab") as f:
+        if is_new:
+            _write_header(f)
+        f.write(records.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def load_records(path: str, start: int = 0) -> np.ndarray:
+    """Memory-map record mulai dari index start (tanpa deduplikasi)"""
+    total = count_records(path)
+    if start >= total:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    _check_header(path)
+    return np.memmap(
+        path,
+        dtype=RECORD_DTYPE,
+        mode="r",
+        offset=HEADER_SIZE + start * RECORD_DTYPE.itemsize,
+        shape=(total - start,),
+    )
+
+
+def latest_by_name(records: np.ndarray) -> dict:
+    """nama -> embedding (view float32) dari record terakhir untuk nama tersebut"""
+    result = {}
+    for record in records:
+        result[record["name"].decode("utf-8")] = record["embedding"]
+    return result
+
+
+def load_database(path: str) -> dict:
+    return latest_by_name(load_records(path))
+
+
+def import_json(json_path: str, path: str):
+    with open(json_path, "r") as f:
+        data = json.load(f)
+    append_records(path, data.items())
+    return len(data)
+
+
+def export_json(path: str, json_path: str):
+    data = {name: embedding.tolist() for name, embedding in load_database(path).items()}
+    with open(json_path, "w") as f:
+        json.dump(data, f, indent=4)
+    return len(data)
+
+
+def compact(path: str):
+    """Tulis ulang file tanpa record yang sudah tertimpa"""
+    # Salin dari memmap dulu supaya file lama bisa diganti (Windows mengunci file yang di-map)
+    records = load_records(path)
+    database = {name: np.array(embedding) for name, embedding in latest_by_name(records).items()}
+    del records
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    append_records(tmp_path, database.items())
+    os.replace(tmp_path, path)
+    return len(database)
+
+
+def main(argv):
+    if len(argv) == 3 and argv[0] == "import":
+        print(f"{import_json(argv[1], argv[2])} embedding diimpor ke {argv[2]}")
+    elif len(argv) == 3 and argv[0] == "export":
+        print(f"{export_json(argv[1], argv[2])} embedding diekspor ke {argv[2]}")
+    elif len(argv) == 2 and argv[0] == "compact":
+        print(f"{argv[1]} dipadatkan menjadi {compact(argv[1])} record")
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,57 @@
+"""
+Fusi beberapa sampel embedding wajah menjadi satu embedding enrollment.
+
+Dipakai oleh registrasi_lokal.py dan bisa dipakai endpoint enrollment di
+server: hanya bergantung pada numpy (tanpa sklearn / dlib).
+"""
+import numpy as np
+
+OUTLIER_THRESHOLD = 0.15
+MAX_FUSION_SAMPLES = 12
+
+
+def similarity_matrix(embeddings: np.ndarray) -> np.ndarray:
+    """Matriks cosine similarity semua pasangan: satu perkalian matriks ter-normalisasi"""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    normalized = embeddings / np.where(norms == 0, 1.0, norms)
+    return normalized @ normalized.T
+
+
+def remove_outliers(embeddings: np.ndarray, threshold: float = OUTLIER_THRESHOLD) -> np.ndarray:
+    """
+    Return index embedding yang dipertahankan: rata-rata similarity ke sampel lain
+    tidak lebih rendah dari (rata-rata keseluruhan - threshold).
+    """
+    n = len(embeddings)
+    if n < 3:
+        return np.arange(n)
+
+    similarities = similarity_matrix(embeddings)
+    # Rata-rata similarity ke sampel lain (tanpa diagonal)
+    mean_similarity = (similarities.sum(axis=1) - np.diag(similarities)) / (n - 1)
+
+    kept = np.flatnonzero(mean_similarity >= mean_similarity.mean() - threshold)
+    return kept if len(kept) else np.arange(1)
+
+
+def fuse_embeddings(
+    embeddings,
+    qualities,
+    max_samples: int = MAX_FUSION_SAMPLES,
+    threshold: float = OUTLIER_THRESHOLD,
+):
+    """
+    Ambil max_samples sampel dengan kualitas tertinggi, buang outlier, lalu hitung
+    rata-rata berbobot kualitas. Return (embedding_final, index_sampel_yang_dipakai).
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float64)
+    qualities = np.asarray(qualities, dtype=np.float64)
+    if len(embeddings) == 0:
+        raise ValueError("Tidak ada sampel embedding untuk difusikan.")
+
+    best = np.argsort(-qualities, kind="stable")[:max_samples]
+    used = best[remove_outliers(embeddings[best], threshold)]
+
+    weights = qualities[used] / np.sum(qualities[used])
+    final_embedding = np.average(embeddings[used], axis=0, weights=weights)
+    return final_embedding, used
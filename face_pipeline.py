@@ -0,0 +1,174 @@
+"""
+Tahap-tahap pemrosesan gambar wajah: decode -> deteksi -> encoding.
+Fungsi di modul ini dijalankan di dalam proses worker InferenceEngine
+(lihat inference.py), bukan di event loop server.
+
+Biaya HOG sebanding dengan jumlah piksel, jadi deteksi dilakukan pada gambar
+yang di-decode dengan skala kecil (IMREAD_REDUCED_*, memakai DCT scaling
+libjpeg sehingga decode-nya juga lebih murah). Kotak wajah lalu dipetakan
+kembali ke gambar resolusi penuh dan hanya ROI wajah yang di-encode.
+"""
+import os
+import time
+
+import cv2
+import face_recognition
+import numpy as np
+
+import face_quality
+from face_results import STATUS_OK, STATUS_INVALID_IMAGE, STATUS_NO_FACE, STATUS_REJECTED
+
+# Gambar contoh untuk warmup; jika tidak ada, warmup hanya memakai frame sintetis
+FACE_WARMUP_IMAGE = os.getenv(
+    "FACE_WARMUP_IMAGE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "warmup_face.jpg")
+)
+# Faktor reduksi untuk deteksi: 1 (tanpa reduksi), 2, 4 atau 8
+FACE_DETECT_REDUCE = int(os.getenv("FACE_DETECT_REDUCE", "2"))
+# Gambar yang setelah direduksi sisi terpendeknya di bawah ini (mis. crop wajah
+# dari browser) dideteksi pada resolusi penuh; gambar sekecil itu murah di-decode
+FACE_DETECT_MIN_SIDE = int(os.getenv("FACE_DETECT_MIN_SIDE", "200"))
+# Margin di sekitar kotak wajah saat crop ROI (proporsi dari ukuran kotak)
+FACE_ROI_MARGIN = float(os.getenv("FACE_ROI_MARGIN", "0.25"))
+# Jika 0, encoding dilakukan langsung pada gambar kecil (lebih cepat, kurang akurat)
+FACE_ENCODE_FULL_RES = os.getenv("FACE_ENCODE_FULL_RES", "1") == "1"
+
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def warmup(sample_path: str = FACE_WARMUP_IMAGE):
+    """
+    Sentuh detector HOG, shape predictor dan encoder ResNet sekali per proses,
+    lalu jalankan pipeline lengkap pada gambar contoh jika tersedia.
+    Return status encode_face gambar contoh, atau None jika tidak ada.
+    """
+    blank = np.zeros((160, 160, 3), dtype=np.uint8)
+    face_recognition.face_locations(blank)
+    face_recognition.face_encodings(blank, [(20, 140, 140, 20)])
+    if sample_path and os.path.isfile(sample_path):
+        with open(sample_path, "rb") as f:
+            status, _, _ = encode_face(f.read(), gate=False)
+        return status
+    return None
+
+
+def decode_image(buffer: np.ndarray, reduce: int = 1):
+    """Decode JPEG/PNG ke BGR; reduce > 1 memakai IMREAD_REDUCED_COLOR_{reduce}"""
+    if reduce not in _REDUCED_FLAGS:
+        raise ValueError(f"Faktor reduksi tidak didukung: {reduce}")
+    if buffer.size == 0:
+        return None  # cv2.imdecode raise cv2.error untuk buffer kosong
+    return cv2.imdecode(buffer, _REDUCED_FLAGS[reduce])
+
+
+def detect_faces(image: np.ndarray):
+    """Deteksi wajah (HOG) pada gambar BGR, return list (top, right, bottom, left)"""
+    return face_recognition.face_locations(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
+
+def map_location(face_location, src_shape, dst_shape, margin: float = 0.0):
+    """
+    Petakan kotak wajah dari gambar src ke gambar dst (skala berbeda),
+    lalu perbesar dengan margin dan clip ke batas gambar dst.
+    """
+    top, right, bottom, left = face_location
+    scale_y = dst_shape[0] / src_shape[0]
+    scale_x = dst_shape[1] / src_shape[1]
+    pad_y = (bottom - top) * margin
+    pad_x = (right - left) * margin
+
+    top = max(0, int((top - pad_y) * scale_y))
+    left = max(0, int((left - pad_x) * scale_x))
+    bottom = min(dst_shape[0], int(round((bottom + pad_y) * scale_y)))
+    right = min(dst_shape[1], int(round((right + pad_x) * scale_x)))
+    return top, right, bottom, left
+
+
+def encode_roi(image: np.ndarray, face_location, margin: float = FACE_ROI_MARGIN):
+    """Encode hanya area ROI wajah (plus margin) dari gambar BGR"""
+    roi_top, roi_right, roi_bottom, roi_left = map_location(face_location, image.shape, image.shape, margin)
+    roi = cv2.cvtColor(image[roi_top:roi_bottom, roi_left:roi_right], cv2.COLOR_BGR2RGB)
+
+    top, right, bottom, left = face_location
+    relative_location = (top - roi_top, right - roi_left, bottom - roi_top, left - roi_left)
+    return face_recognition.face_encodings(roi, [relative_location])[0]
+
+
+def encode_face(
+    contents: bytes,
+    reduce: int = FACE_DETECT_REDUCE,
+    margin: float = FACE_ROI_MARGIN,
+    full_res: bool = FACE_ENCODE_FULL_RES,
+    gate: bool = face_quality.QUALITY_GATE_ENABLED,
+):
+    """
+    Decode bytes gambar, deteksi wajah dan hitung embedding wajah pertama.
+    Return (status, embedding, info): embedding None jika status bukan STATUS_OK,
+    info berisi "stages" (detik per tahap), "image" (dimensi gambar yang dideteksi)
+    dan "reason" jika ditolak quality gate.
+    """
+    stages = {}
+    info = {"stages": stages}
+
+    start = time.perf_counter()
+    buffer = np.frombuffer(contents, np.uint8)
+    small = decode_image(buffer, reduce)
+    if small is not None and reduce > 1 and min(small.shape[:2]) < FACE_DETECT_MIN_SIDE:
+        small = decode_image(buffer, 1)
+        reduce = 1
+    stages["decode"] = time.perf_counter() - start
+    if small is None:
+        return STATUS_INVALID_IMAGE, None, info
+    info["image"] = {"width": small.shape[1], "height": small.shape[0], "reduce": reduce}
+
+    # Quality gate murah pada frame kecil sebelum membayar HOG
+    if gate:
+        start = time.perf_counter()
+        info["reason"] = face_quality.check_frame(small)
+        stages["gate"] = time.perf_counter() - start
+        if info["reason"]:
+            return STATUS_REJECTED, None, info
+
+    start = time.perf_counter()
+    face_locations = detect_faces(small)
+    stages["detect"] = time.perf_counter() - start
+    if not face_locations:
+        return STATUS_NO_FACE, None, info
+
+    # Cek ROI wajah sebelum membayar encoding
+    if gate:
+        start = time.perf_counter()
+        info["reason"] = face_quality.check_face(small, face_locations[0])
+        stages["gate"] += time.perf_counter() - start
+        if info["reason"]:
+            return STATUS_REJECTED, None, info
+
+    start = time.perf_counter()
+    if reduce == 1 or not full_res:
+        embedding = encode_roi(small, face_locations[0], margin)
+    else:
+        image = decode_image(buffer, 1)
+        face_location = map_location(face_locations[0], small.shape, image.shape)
+        embedding = encode_roi(image, face_location, margin)
+    stages["encode"] = time.perf_counter() - start
+    return STATUS_OK, embedding, info
+
+
+def encode_faces(batch):
+    """
+    Versi batch dari encode_face untuk MicroBatcher: satu task pool untuk
+    beberapa gambar, hasil dikembalikan dengan urutan yang sama. Error pada
+    satu gambar hanya menjadi STATUS_INVALID_IMAGE untuk gambar itu, tidak
+    menggagalkan gambar lain di batch yang sama.
+    """
+    results = []
+    for contents in batch:
+        try:
+            results.append(encode_face(contents))
+        except Exception as e:
+            results.append((STATUS_INVALID_IMAGE, None, {"stages": {}, "error": repr(e)}))
+    return results
@@ -0,0 +1,132 @@
+"""
+Metrik kualitas gambar wajah, dipakai bersama oleh registrasi lokal
+(quality_score) dan server (quality gate sebelum encoding).
+
+Quality gate dijalankan di worker inference pada gambar yang sudah diperkecil:
+frame yang gelap, buram, terlalu kecil atau tidak di tengah ditolak sebelum
+membayar biaya deteksi/encoding penuh, dengan petunjuk spesifik untuk user.
+"""
+import os
+
+import cv2
+import numpy as np
+
+# Alasan penolakan dan petunjuknya ada di face_results (tanpa cv2)
+from face_results import (  # noqa: F401
+    QUALITY_GATE_ENABLED, REJECT_TOO_DARK, REJECT_TOO_BRIGHT, REJECT_LOW_CONTRAST,
+    REJECT_BLURRY, REJECT_TOO_SMALL, REJECT_OFF_CENTER, RETRY_HINTS,
+)
+
+QUALITY_MIN_BRIGHTNESS = float(os.getenv("QUALITY_MIN_BRIGHTNESS", "40"))
+QUALITY_MAX_BRIGHTNESS = float(os.getenv("QUALITY_MAX_BRIGHTNESS", "230"))
+QUALITY_MIN_CONTRAST = float(os.getenv("QUALITY_MIN_CONTRAST", "15"))
+QUALITY_MIN_SHARPNESS = float(os.getenv("QUALITY_MIN_SHARPNESS", "15"))
+# Tinggi kotak wajah minimal, relatif terhadap tinggi frame
+QUALITY_MIN_FACE_RATIO = float(os.getenv("QUALITY_MIN_FACE_RATIO", "0.12"))
+QUALITY_REQUIRE_CENTERED = os.getenv("QUALITY_REQUIRE_CENTERED", "1") == "1"
+
+
+def variance_of_laplacian(image):
+    """Menghitung fokus gambar menggunakan variance of Laplacian"""
+    return cv2.Laplacian(image, cv2.CV_64F).var()
+
+def calculate_brightness(image):
+    """Menghitung tingkat kecerahan gambar"""
+    return np.mean(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+
+def calculate_contrast(image):
+    """Menghitung kontras gambar menggunakan standard deviation"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return np.std(gray)
+
+def is_face_centered(face_location, frame_shape):
+    """Mengecek apakah wajah berada di tengah frame"""
+    top, right, bottom, left = face_location
+    frame_h, frame_w = frame_shape[:2]
+    
+    face_center_x = (left + right) // 2
+    face_center_y = (top + bottom) // 2
+    frame_center_x = frame_w // 2
+    frame_center_y = frame_h // 2
+    
+    # Toleransi 25% dari ukuran frame
+    tolerance_x = frame_w * 0.25
+    tolerance_y = frame_h * 0.25
+    
+    return (abs(face_center_x - frame_center_x) < tolerance_x and 
+            abs(face_center_y - frame_center_y) < tolerance_y)
+
+def calculate_face_angle_score(landmarks):
+    """Menghitung skor berdasarkan posisi wajah (frontal lebih baik)"""
+    if not landmarks:
+        return 0
+    
+    # Ambil landmark mata dan hidung
+    left_eye = np.array(landmarks[0]['left_eye'])
+    right_eye = np.array(landmarks[0]['right_eye'])
+    nose_tip = np.array(landmarks[0]['nose_tip'])
+    
+    # Hitung simetri mata
+    eye_center = (left_eye.mean(axis=0) + right_eye.mean(axis=0)) / 2
+    nose_center = nose_tip.mean(axis=0)
+    
+    # Skor berdasarkan seberapa tengah hidung relatif terhadap mata
+    horizontal_symmetry = abs(nose_center[0] - eye_center[0])
+    
+    # Semakin kecil asymmetry, semakin bagus (frontal)
+    return max(0, 100 - horizontal_symmetry)
+
+def quality_score(frame, face_location, face_landmarks):
+    """Menghitung skor kualitas gambar secara komprehensif"""
+    top, right, bottom, left = face_location
+    
+    # ROI wajah
+    face_roi = frame[top:bottom, left:right]
+    face_roi_gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
+    
+    # Berbagai metrik kualitas
+    blur_score = variance_of_laplacian(face_roi_gray)
+    brightness = calculate_brightness(face_roi)
+    contrast = calculate_contrast(face_roi)
+    face_size = (bottom - top) * (right - left)
+    is_centered = is_face_centered(face_location, frame.shape)
+    angle_score = calculate_face_angle_score(face_landmarks)
+    
+    # Normalisasi dan bobot
+    scores = {
+        'blur': min(blur_score / 100.0, 1.0) * 30,
+        'brightness': (1 - abs(brightness - 128) / 128.0) * 20,
+        'contrast': min(contrast / 50.0, 1.0) * 15,
+        'size': min(face_size / 40000.0, 1.0) * 20,
+        'centered': 10 if is_centered else 0,
+        'angle': angle_score / 100.0 * 5
+    }
+    
+    total_score = sum(scores.values())
+    return total_score, scores
+
+
+def check_frame(image):
+    """Cek seluruh frame (BGR) sebelum deteksi; return alasan penolakan atau None"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    brightness = float(np.mean(gray))
+    if brightness < QUALITY_MIN_BRIGHTNESS:
+        return REJECT_TOO_DARK
+    if brightness > QUALITY_MAX_BRIGHTNESS:
+        return REJECT_TOO_BRIGHT
+    if float(np.std(gray)) < QUALITY_MIN_CONTRAST:
+        return REJECT_LOW_CONTRAST
+    return None
+
+
+def check_face(image, face_location):
+    """Cek ROI wajah hasil deteksi sebelum encoding; return alasan penolakan atau None"""
+    top, right, bottom, left = face_location
+    if (bottom - top) < image.shape[0] * QUALITY_MIN_FACE_RATIO:
+        return REJECT_TOO_SMALL
+    if QUALITY_REQUIRE_CENTERED and not is_face_centered(face_location, image.shape):
+        return REJECT_OFF_CENTER
+    face_roi_gray = cv2.cvtColor(image[top:bottom, left:right], cv2.COLOR_BGR2GRAY)
+    if variance_of_laplacian(face_roi_gray) < QUALITY_MIN_SHARPNESS:
+        return REJECT_BLURRY
+    return None
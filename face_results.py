@@ -0,0 +1,78 @@
+"""
+Hasil pipeline wajah yang dibutuhkan proses server: status encode_face,
+alasan penolakan quality gate beserta petunjuknya, dan counter gate_stats.
+
+Modul ini sengaja tidak meng-import cv2/face_recognition, sehingga worker
+API dan route absensi bisa dimuat tanpa stack vision; decode, deteksi dan
+encoding hanya berjalan di proses worker inference (face_pipeline).
+"""
+import os
+
+STATUS_OK = "ok"
+STATUS_INVALID_IMAGE = "invalid_image"
+STATUS_NO_FACE = "no_face"
+STATUS_REJECTED = "rejected"
+
+QUALITY_GATE_ENABLED = os.getenv("QUALITY_GATE_ENABLED", "1") == "1"
+
+REJECT_TOO_DARK = "too_dark"
+REJECT_TOO_BRIGHT = "too_bright"
+REJECT_LOW_CONTRAST = "low_contrast"
+REJECT_BLURRY = "blurry"
+REJECT_TOO_SMALL = "face_too_small"
+REJECT_OFF_CENTER = "off_center"
+
+RETRY_HINTS = {
+    REJECT_TOO_DARK: "Gambar terlalu gelap. Pindah ke tempat yang lebih terang lalu coba lagi.",
+    REJECT_TOO_BRIGHT: "Gambar terlalu terang. Hindari cahaya langsung dari belakang atau depan kamera.",
+    REJECT_LOW_CONTRAST: "Gambar kurang jelas. Pastikan wajah terlihat jelas dan lensa kamera bersih.",
+    REJECT_BLURRY: "Gambar buram. Tahan kamera tetap diam lalu coba lagi.",
+    REJECT_TOO_SMALL: "Wajah terlalu jauh. Dekatkan wajah ke kamera.",
+    REJECT_OFF_CENTER: "Wajah tidak di tengah. Posisikan wajah di tengah layar.",
+}
+
+
+class QualityGateStats:
+    """
+    Counter quality gate di proses server. Biaya yang dihemat diperkirakan dari
+    rata-rata (EWMA) waktu deteksi/encoding pada request yang lolos.
+    """
+
+    def __init__(self, alpha: float = 0.1):
+        self.alpha = alpha
+        self.checked = 0
+        self.rejected = {}
+        self.gate_seconds = 0.0
+        self.saved_seconds = 0.0
+        self._avg = {"detect": None, "encode": None}
+
+    def _update_avg(self, stage, seconds):
+        current = self._avg[stage]
+        self._avg[stage] = seconds if current is None else current + self.alpha * (seconds - current)
+
+    def record(self, rejected_reason, stages: dict):
+        self.checked += 1
+        self.gate_seconds += stages.get("gate", 0.0)
+        if rejected_reason is None:
+            for stage in ("detect", "encode"):
+                if stage in stages:
+                    self._update_avg(stage, stages[stage])
+            return
+
+        self.rejected[rejected_reason] = self.rejected.get(rejected_reason, 0) + 1
+        saved = self._avg["encode"] or 0.0
+        if "detect" not in stages:
+            saved += self._avg["detect"] or 0.0
+        self.saved_seconds += saved
+
+    def stats(self) -> dict:
+        return {
+            "enabled": QUALITY_GATE_ENABLED,
+            "checked": self.checked,
+            "rejected": dict(self.rejected),
+            "gate_cpu_seconds": self.gate_seconds,
+            "estimated_cpu_seconds_saved": self.saved_seconds,
+        }
+
+
+gate_stats = QualityGateStats()
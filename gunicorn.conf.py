@@ -0,0 +1,58 @@
+"""
+Konfigurasi gunicorn untuk produksi:
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+preload_app memuat aplikasi (termasuk model dlib yang dimuat saat
+face_recognition di-import) sekali di proses master, lalu warmup dijalankan
+di master sebelum fork. Worker uvicorn dan pool inference-nya (start method
+fork) mewarisi halaman memori model secara copy-on-write, tanpa memuat ulang
+model per proses. Load balancer sebaiknya memakai /health/ready.
+
+Dengan APP_ROLE=api (lihat main.py) stack vision tidak dimuat sama sekali;
+jalankan dua grup worker dan arahkan /attendance ke grup vision:
+
+    APP_ROLE=api gunicorn -c gunicorn.conf.py -b 0.0.0.0:8000 wsgi:application
+    APP_ROLE=vision gunicorn -c gunicorn.conf.py -b 0.0.0.0:8001 wsgi:application
+
+Selain /attendance, grup vision juga melayani /admin/inference/stats dan
+/metrics (routes/monitoring.py), karena micro-batcher dan histogram latensi
+hanya terisi di proses vision. Arahkan kedua path itu (dan scrape Prometheus)
+ke grup vision; di grup api keduanya 404. /admin/db/pool-stats dilayani
+kedua grup dan melaporkan pool proses yang menjawab: pool async untuk
+/attendance hanya terlihat lewat grup vision.
+"""
+import gc
+import os
+import time
+
+# Harus diset sebelum aplikasi di-import oleh preload_app
+os.environ.setdefault("INFERENCE_START_METHOD", "fork")
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+
+
+def when_ready(server):
+    """Dijalankan di master setelah aplikasi dimuat, sebelum worker di-fork"""
+    if os.getenv("APP_ROLE", "all") == "api":
+        gc.freeze()
+        return
+
+    import face_pipeline
+
+    start = time.perf_counter()
+    status = face_pipeline.warmup()
+    server.log.info(
+        "Warmup model selesai dalam %.2f detik (gambar contoh: %s)",
+        time.perf_counter() - start, status or "tidak ada",
+    )
+    # Objek yang sudah ada dipindah ke generasi permanen, supaya GC di worker
+    # tidak menulis refcount/header ke halaman yang dibagi dengan master
+    gc.freeze()
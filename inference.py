@@ -0,0 +1,254 @@
+"""
+Inference engine untuk verifikasi wajah.
+
+Deteksi HOG dan encoding ResNet dijalankan di pool proses terpisah
+sehingga event loop FastAPI tetap bebas melayani login, jadwal, dll.
+Jumlah pekerjaan yang antre dibatasi; jika penuh request langsung ditolak
+(backpressure) daripada menumpuk sampai semua client timeout.
+
+Di depan engine ada MicroBatcher: request yang datang dalam beberapa
+milidetik dikumpulkan menjadi satu task pool, sehingga biaya IPC dan
+penjadwalan per gambar berkurang saat pergantian shift.
+"""
+import asyncio
+import functools
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "16"))
+INFERENCE_TIMEOUT_SECONDS = float(os.getenv("INFERENCE_TIMEOUT_SECONDS", "10"))
+INFERENCE_RETRY_AFTER_SECONDS = int(os.getenv("INFERENCE_RETRY_AFTER_SECONDS", "2"))
+INFERENCE_START_METHOD = os.getenv("INFERENCE_START_METHOD", "spawn")
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))
+
+logger = logging.getLogger("absensi.inference")
+
+
+def warmup():
+    """Initializer worker: stack vision (cv2, dlib) hanya di-import di proses worker"""
+    import face_pipeline
+    return face_pipeline.warmup()
+
+
+def encode_faces(batch):
+    """batch_fn MicroBatcher; dijalankan di proses worker"""
+    import face_pipeline
+    return face_pipeline.encode_faces(batch)
+
+
+class InferenceBusy(Exception):
+    """Antrian inference penuh atau pool sedang dipulihkan"""
+
+
+class InferenceTimeout(Exception):
+    """Pekerjaan inference melebihi INFERENCE_TIMEOUT_SECONDS"""
+
+
+class InferenceEngine:
+    def __init__(
+        self,
+        workers: int = INFERENCE_WORKERS,
+        queue_size: int = INFERENCE_QUEUE_SIZE,
+        timeout: float = INFERENCE_TIMEOUT_SECONDS,
+        initializer=warmup,
+    ):
+        self.workers = workers
+        self.initializer = initializer
+        self.capacity = workers + queue_size
+        self.timeout = timeout
+        self.pending = 0
+        self.ready = False
+        self.warmup_status = None
+        self.warmup_seconds = None
+        self._executor = None
+
+    def start(self):
+        """Buat pool proses; setiap worker memuat model dlib sekali saat start"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(INFERENCE_START_METHOD),
+                initializer=self.initializer,
+            )
+
+    async def warmup(self):
+        """
+        Buat pool dan jalankan warmup sekali lewat pool (tanpa batas timeout
+        request); ready menjadi True setelah selesai (lihat /health/ready).
+        """
+        self.start()
+        start = time.perf_counter()
+        self.warmup_status = await asyncio.wrap_future(self._executor.submit(warmup))
+        self.warmup_seconds = time.perf_counter() - start
+        self.ready = True
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _release(self, weight: int):
+        self.pending -= weight
+
+    async def run(self, fn, *args, weight: int = 1):
+        """
+        Jalankan fn(*args) di pool proses dan tunggu hasilnya.
+        weight = jumlah gambar yang diproses task ini (untuk batas antrian).
+        Raise InferenceBusy jika antrian penuh, InferenceTimeout jika terlalu lama.
+        """
+        if self.pending + weight > self.capacity:
+            raise InferenceBusy()
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # Worker mati (mis. OOM); buang pool lama, pool baru dibuat di request berikutnya
+            self.shutdown()
+            raise InferenceBusy()
+
+        # Slot baru dilepas saat proses worker benar-benar selesai, bukan saat
+        # handler berhenti menunggu, supaya backpressure mencerminkan beban nyata.
+        self.pending += weight
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release, weight))
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise InferenceTimeout()
+        except BrokenProcessPool:
+            self.shutdown()
+            raise InferenceBusy()
+
+
+class MicroBatcher:
+    """
+    Kumpulkan item yang datang dalam max_wait_ms (maksimal max_batch_size item)
+    lalu jalankan batch_fn(list_item) di engine. Batch dibagi rata ke semua
+    worker (satu task pool per potongan) supaya burst tidak diproses berurutan
+    di satu proses. Hasil ke-i dikembalikan ke pemanggil ke-i.
+    """
+
+    def __init__(
+        self,
+        engine: InferenceEngine,
+        batch_fn,
+        max_batch_size: int = INFERENCE_MAX_BATCH_SIZE,
+        max_wait_ms: float = INFERENCE_MAX_WAIT_MS,
+    ):
+        self.engine = engine
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self._items = []
+        self._timer = None
+        # Event loop hanya menyimpan weak reference ke task; batch yang berjalan dipegang di sini
+        self._tasks = set()
+
+        # Metrik
+        self.batches_total = 0
+        self.items_total = 0
+        self.flushed_full = 0
+        self.flushed_timeout = 0
+        self.wait_seconds_total = 0.0
+
+    async def submit(self, item):
+        # Tolak di awal jika item ini tidak akan muat di antrian engine
+        if self.engine.pending + len(self._items) >= self.engine.capacity:
+            raise InferenceBusy()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._items.append((item, future, time.perf_counter()))
+
+        if len(self._items) >= self.max_batch_size:
+            self.flushed_full += 1
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush_on_timeout)
+
+        return await future
+
+    def _flush_on_timeout(self):
+        self.flushed_timeout += 1
+        self._flush()
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._items = self._items, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(functools.partial(self._batch_done, batch))
+
+    def _batch_done(self, batch, task):
+        self._tasks.discard(task)
+        if task.cancelled():
+            error = InferenceBusy()
+        elif task.exception() is not None:
+            error = task.exception()
+            logger.error("Micro-batch %d item gagal", len(batch), exc_info=error)
+        else:
+            return
+        # Jangan biarkan pemanggil menunggu selamanya
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _run_batch(self, batch):
+        now = time.perf_counter()
+        self.batches_total += 1
+        self.items_total += len(batch)
+        self.wait_seconds_total += sum(now - queued_at for _, _, queued_at in batch)
+
+        size = math.ceil(len(batch) / max(1, self.engine.workers))
+        await asyncio.gather(*(
+            self._run_slice(batch[i:i + size]) for i in range(0, len(batch), size)
+        ))
+
+    async def _run_slice(self, batch):
+        try:
+            results = await self.engine.run(
+                self.batch_fn, [item for item, _, _ in batch], weight=len(batch)
+            )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        batches = self.batches_total or 1
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches_total": self.batches_total,
+            "items_total": self.items_total,
+            "avg_batch_size": self.items_total / batches,
+            "batch_fill_rate": self.items_total / (batches * self.max_batch_size),
+            "flushed_full": self.flushed_full,
+            "flushed_timeout": self.flushed_timeout,
+            "avg_wait_ms": self.wait_seconds_total / (self.items_total or 1) * 1000.0,
+            "engine_pending": self.engine.pending,
+            "engine_capacity": self.engine.capacity,
+            "engine_ready": self.engine.ready,
+        }
+
+
+engine = InferenceEngine()
+face_batcher = MicroBatcher(engine, encode_faces)
@@ -1,14 +1,27 @@
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
-from database import engine, Base
-
-from routes import auth as auth_router
-from routes import schedule as schedule_router
-from routes import attendance as attendance_router
-from routes import swap_requests as swap_requests_router
-from routes import admin as admin_router
-from routes import manager as manager_router
-from routes import users as users_router
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import logging
+import os
+import resource
+
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse, JSONResponse
+from database import engine, Base, start_statement_counter
+from inference import engine as inference_engine
+import metrics
+from query_profiles import DB_STATEMENT_BUDGET_ENABLED, DB_STATEMENT_BUDGET_STRICT, STATEMENT_BUDGETS
+
+# Pembagian worker: api (semua endpoint kecuali /attendance), vision (hanya
+# /attendance dan monitoring inference, dengan pool inference) atau all
+# (semuanya, default)
+APP_ROLE = os.getenv("APP_ROLE", "all")
+if APP_ROLE not in ("all", "api", "vision"):
+    raise ValueError(f"APP_ROLE tidak valid: {APP_ROLE} (gunakan all, api atau vision)")
+SERVES_API = APP_ROLE in ("all", "api")
+SERVES_VISION = APP_ROLE in ("all", "vision")
 
 app = FastAPI(title="Sistem Absensi Wajah dengan MySQL (Modular)")
 
@@ -16,13 +29,156 @@ app = FastAPI(title="Sistem Absensi Wajah dengan MySQL (Modular)")
 # Base.metadata.create_all(bind=engine)
 
 # Include API routers
-app.include_router(auth_router.router)
-app.include_router(users_router.router)
-app.include_router(schedule_router.router)
-app.include_router(attendance_router.router)
-app.include_router(swap_requests_router.router)
-app.include_router(admin_router.router)
-app.include_router(manager_router.router)
+from routes import monitoring as monitoring_router
+
+if SERVES_API:
+    from routes import auth as auth_router
+    from routes import schedule as schedule_router
+    from routes import swap_requests as swap_requests_router
+    from routes import admin as admin_router
+    from routes import manager as manager_router
+    from routes import users as users_router
+    from routes import export as export_router
+
+    app.include_router(auth_router.router)
+    app.include_router(users_router.router)
+    app.include_router(schedule_router.router)
+    app.include_router(swap_requests_router.router)
+    app.include_router(admin_router.router)
+    app.include_router(manager_router.router)
+    app.include_router(export_router.router)
+
+if SERVES_VISION:
+    from routes import attendance as attendance_router
+
+    app.include_router(attendance_router.router)
+    app.include_router(monitoring_router.router)
+
+# Pool DB per proses: setiap role melaporkan pool miliknya sendiri
+app.include_router(monitoring_router.pool_router)
+
+logger = logging.getLogger("absensi")
+
+
+@app.middleware("http")
+async def record_stage_metrics(request: Request, call_next):
+    """Timer per tahap untuk request POST /attendance/* (lihat metrics.py)"""
+    if request.method != "POST" or not request.url.path.startswith("/attendance/"):
+        return await call_next(request)
+
+    timer = metrics.start_timer(request.url.path)
+    try:
+        response = await call_next(request)
+    except Exception:
+        metrics.finish(timer, outcome="error")
+        raise
+    route = request.scope.get("route")
+    metrics.finish(
+        timer,
+        endpoint=getattr(route, "path", None),
+        outcome="ok" if response.status_code < 400 else "error",
+    )
+    return response
+
+
+@app.middleware("http")
+async def check_statement_budget(request: Request, call_next):
+    """Hitung statement SQL per request dan bandingkan dengan STATEMENT_BUDGETS"""
+    if not DB_STATEMENT_BUDGET_ENABLED:
+        return await call_next(request)
+
+    counter = start_statement_counter()
+    response = await call_next(request)
+
+    route = request.scope.get("route")
+    budget = STATEMENT_BUDGETS.get(getattr(route, "path", None))
+    if budget is not None and counter.count > budget:
+        logger.warning("%s %s: %d statement SQL (batas %d)", request.method, route.path, counter.count, budget)
+        if DB_STATEMENT_BUDGET_STRICT:
+            return JSONResponse(
+                status_code=500,
+                content={"detail": f"Batas statement SQL terlewati: {counter.count} > {budget}"},
+            )
+    response.headers["X-DB-Statements"] = str(counter.count)
+    return response
+
+
+async def warm_inference_engine():
+    try:
+        await inference_engine.warmup()
+        logger.info("Inference engine siap (warmup %.2f detik)", inference_engine.warmup_seconds)
+    except Exception:
+        logger.exception("Warmup inference engine gagal")
+
+
+def process_uptime() -> float:
+    """Detik sejak proses dimulai (termasuk import sebelum main), dari /proc jika ada"""
+    try:
+        with open("/proc/self/stat") as f:
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - started_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.perf_counter() - _IMPORT_STARTED
+
+
+def rss_mb() -> float:
+    """RSS proses saat ini dalam MB (puncak RSS jika /proc tidak tersedia)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1048576
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@app.on_event("startup")
+async def report_startup():
+    app.state.startup_seconds = process_uptime()
+    app.state.startup_rss_mb = rss_mb()
+    logger.info(
+        "APP_ROLE=%s siap dalam %.2f detik, RSS %.1f MB",
+        APP_ROLE, app.state.startup_seconds, app.state.startup_rss_mb,
+    )
+
+
+@app.on_event("startup")
+async def start_inference_engine():
+    if not SERVES_VISION:
+        return
+    # Warmup di background: server sudah menerima request, /health/ready 503 sampai selesai
+    app.state.warmup_task = asyncio.create_task(warm_inference_engine())
+
+
+@app.on_event("shutdown")
+def stop_inference_engine():
+    inference_engine.shutdown()
+
+
+@app.get("/health/live", include_in_schema=False)
+async def liveness():
+    return {
+        "status": "ok",
+        "role": APP_ROLE,
+        "startup_seconds": app.state.startup_seconds,
+        "startup_rss_mb": app.state.startup_rss_mb,
+        "rss_mb": rss_mb(),
+    }
+
+
+@app.get("/health/ready", include_in_schema=False)
+async def readiness():
+    """Sehat hanya setelah pool inference dibuat dan warmup model selesai"""
+    if not SERVES_VISION:
+        return {"status": "ready"}
+    if not inference_engine.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    return {
+        "status": "ready",
+        "warmup_seconds": inference_engine.warmup_seconds,
+        "warmup_sample": inference_engine.warmup_status,
+    }
+
 
 @app.get("/", include_in_schema=False)
 async def serve_login():
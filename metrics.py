@@ -0,0 +1,172 @@
+"""
+Instrumentasi latensi per tahap untuk pipeline absensi.
+
+Setiap request absensi (lihat middleware di main.py) dan setiap frame
+verifikasi streaming mendapat StageTimer di ContextVar. Tahap di server
+(requirements, read, match, commit) diukur dengan `with stage(...)`, tahap
+di worker inference (decode, gate, detect, encode) diambil dari info hasil
+encode_face, dan selisih round-trip inference dicatat sebagai
+inference_wait (antrian, micro-batch, IPC).
+
+Hasilnya dikumpulkan di histogram per proses, diekspor dalam format teks
+Prometheus di /metrics, dengan label endpoint dan outcome (match, no_match,
+no_face, ...). Request yang lebih lambat dari SLOW_REQUEST_SECONDS di-log
+(disampling) beserta rincian tahap dan dimensi gambar. Waktu pencatatan ke
+histogram dan log dicatat di attendance_metrics_overhead_seconds_total;
+METRICS_ENABLED=0 mematikan semuanya (timer tidak dibuat).
+"""
+import bisect
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "2"))
+# Proporsi request lambat yang di-log (1 = semua)
+SLOW_REQUEST_SAMPLE_RATE = float(os.getenv("SLOW_REQUEST_SAMPLE_RATE", "1"))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger("absensi.metrics")
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [hitungan per bucket (+Inf terakhir), sum]
+
+    def observe(self, value: float, *labelvalues):
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labelvalues, (counts, total) in sorted(self._series.items()):
+            labels = ",".join(f'{k}="{v}"' for k, v in zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+stage_seconds = Histogram(
+    "attendance_stage_seconds", "Durasi per tahap pipeline absensi", ("endpoint", "stage", "outcome")
+)
+request_seconds = Histogram(
+    "attendance_request_seconds", "Durasi total request absensi", ("endpoint", "outcome")
+)
+overhead_seconds = 0.0
+slow_requests = 0
+
+
+class StageTimer:
+    __slots__ = ("endpoint", "started", "stages", "outcome", "image")
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.outcome = None
+        self.image = None
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+
+_current_timer: ContextVar = ContextVar("stage_timer", default=None)
+
+
+def start_timer(endpoint: str) -> Optional[StageTimer]:
+    """Mulai timer untuk konteks (request/frame) saat ini; None jika metrik dimatikan"""
+    if not METRICS_ENABLED:
+        return None
+    timer = StageTimer(endpoint)
+    _current_timer.set(timer)
+    return timer
+
+
+@contextmanager
+def stage(name: str):
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - start)
+
+
+def set_outcome(outcome: str):
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.outcome = outcome
+
+
+def record_inference(info: dict, image_bytes: int, roundtrip: float):
+    """Catat tahap worker dari info encode_face; sisa round-trip = inference_wait"""
+    timer = _current_timer.get()
+    if timer is None:
+        return
+    worker_seconds = 0.0
+    for name, seconds in info.get("stages", {}).items():
+        timer.add(name, seconds)
+        worker_seconds += seconds
+    timer.add("inference_wait", max(0.0, roundtrip - worker_seconds))
+    timer.image = dict(info.get("image") or {}, bytes=image_bytes)
+
+
+def finish(timer: Optional[StageTimer], endpoint: Optional[str] = None, outcome: Optional[str] = None):
+    """Masukkan timer ke histogram dan log jika lambat (disampling)"""
+    global overhead_seconds, slow_requests
+    if timer is None:
+        return
+    start = time.perf_counter()
+    total = start - timer.started
+    endpoint = endpoint or timer.endpoint
+    outcome = timer.outcome or outcome or "unknown"
+
+    request_seconds.observe(total, endpoint, outcome)
+    for name, seconds in timer.stages.items():
+        stage_seconds.observe(seconds, endpoint, name, outcome)
+
+    if total >= SLOW_REQUEST_SECONDS:
+        slow_requests += 1
+        if random.random() < SLOW_REQUEST_SAMPLE_RATE:
+            breakdown = " ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in timer.stages.items())
+            logger.warning(
+                "Request lambat %s %.0f ms outcome=%s %s image=%s",
+                endpoint, total * 1000, outcome, breakdown, timer.image,
+            )
+    overhead_seconds += time.perf_counter() - start
+
+
+def sample(name: str, help_text: str, value, kind: str = "counter"):
+    """Baris Prometheus untuk satu counter/gauge tanpa label"""
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+
+
+def render(extra_lines=()) -> str:
+    lines = stage_seconds.render() + request_seconds.render()
+    lines += sample(
+        "attendance_slow_requests_total", "Request absensi di atas SLOW_REQUEST_SECONDS", slow_requests
+    )
+    lines += sample(
+        "attendance_metrics_overhead_seconds_total", "Waktu yang dipakai untuk mencatat metrik", overhead_seconds
+    )
+    lines += extra_lines
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,57 @@
+# migrate_embeddings.py
+"""
+Konversi kolom users.embedding (JSON) ke embedding_vec (float32 biner),
+lihat migrations/005_embedding_binary.sql. Bisa dijalankan ulang: hanya baris
+yang embedding_vec-nya masih kosong yang diproses.
+
+Embedding dari face_embeddings.json / face_embeddings.bin cukup di-seed ulang
+dengan `python seed_db.py --full` (seed_db sudah menulis format biner).
+"""
+import json
+
+from sqlalchemy import text, update
+
+from database import SessionLocal
+from embedding_cache import embedding_update_values
+from models import User
+
+MIGRATE_CHUNK_SIZE = 500
+
+
+def migrate():
+    db = SessionLocal()
+    last_id = 0
+    migrated = 0
+    try:
+        while True:
+            rows = db.execute(
+                text(
+                    "SELECT id, embedding, embedding_version FROM users "
+                    "WHERE id > :last_id AND embedding IS NOT NULL AND embedding_vec IS NULL "
+                    "ORDER BY id LIMIT :limit"
+                ),
+                {"last_id": last_id, "limit": MIGRATE_CHUNK_SIZE},
+            ).all()
+            if not rows:
+                break
+
+            values = []
+            for row in rows:
+                embedding = json.loads(row.embedding) if isinstance(row.embedding, str) else row.embedding
+                item = embedding_update_values(row.id, row.embedding_version, embedding)
+                # Nilai embedding sama, jadi versi tidak perlu dinaikkan
+                item["embedding_version"] = row.embedding_version
+                values.append(item)
+
+            db.execute(update(User), values)
+            db.commit()
+            last_id = rows[-1].id
+            migrated += len(rows)
+            print(f"Embedding dikonversi: {migrated}")
+    finally:
+        db.close()
+    print(f"Migrasi embedding selesai. {migrated} user dikonversi ke format biner.")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,4 @@
+-- Versi embedding per user, dinaikkan setiap kali embedding diubah
+-- (dipakai embedding_cache.py untuk invalidasi lintas proses).
+ALTER TABLE users
+    ADD COLUMN embedding_version INT NOT NULL DEFAULT 0 AFTER embedding;
@@ -0,0 +1,29 @@
+-- Status absensi per user per hari + index komposit untuk query per user/rentang waktu.
+
+CREATE TABLE attendance_days (
+    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    work_date DATE NOT NULL,
+    masuk_at DATETIME NULL,
+    pulang_at DATETIME NULL,
+    CONSTRAINT uq_attendance_days_user_date UNIQUE (user_id, work_date),
+    CONSTRAINT fk_attendance_days_user FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+-- Backfill dari data absensi yang sudah ada. timestamp disimpan dalam UTC,
+-- sedangkan work_date adalah tanggal lokal server aplikasi (date.today() di
+-- record_attendance, local_utc_offset() di attendance_rollup.rebuild).
+-- Default memakai zona waktu server MySQL; jika berbeda dengan server
+-- aplikasi, set manual, mis. SET @local_offset = '07:00:00';
+SET @local_offset = TIMEDIFF(NOW(), UTC_TIMESTAMP());
+
+INSERT INTO attendance_days (user_id, work_date, masuk_at, pulang_at)
+SELECT
+    user_id,
+    DATE(ADDTIME(timestamp, @local_offset)),
+    MIN(CASE WHEN attendance_type = 'masuk' THEN timestamp END),
+    MAX(CASE WHEN attendance_type = 'pulang' THEN timestamp END)
+FROM attendance
+GROUP BY user_id, DATE(ADDTIME(timestamp, @local_offset));
+
+CREATE INDEX ix_attendance_user_timestamp ON attendance (user_id, timestamp);
@@ -0,0 +1,16 @@
+-- Rekap absensi bulanan per user, dipelihara inkremental oleh /attendance/submit.
+
+CREATE TABLE attendance_monthly (
+    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    month_start DATE NOT NULL,
+    days_worked INT NOT NULL DEFAULT 0,
+    late_count INT NOT NULL DEFAULT 0,
+    worked_minutes INT NOT NULL DEFAULT 0,
+    missing_checkouts INT NOT NULL DEFAULT 0,
+    CONSTRAINT uq_attendance_monthly_user_month UNIQUE (user_id, month_start),
+    CONSTRAINT fk_attendance_monthly_user FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+-- Backfill dari attendance_days + schedules (keterlambatan butuh jadwal):
+--     python attendance_rollup.py rebuild
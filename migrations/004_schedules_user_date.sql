@@ -0,0 +1,3 @@
+-- Index untuk lookup jadwal per user per tanggal (check-requirements, upload roster).
+
+CREATE INDEX ix_schedules_user_date ON schedules (user_id, shift_date);
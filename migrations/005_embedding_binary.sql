@@ -0,0 +1,10 @@
+-- Embedding sebagai float32 little-endian biner (512 byte) + tag model dan norm L2.
+-- Kolom JSON lama diisi ulang ke embedding_vec dengan: python migrate_embeddings.py
+
+ALTER TABLE users
+    ADD COLUMN embedding_vec VARBINARY(512) NULL AFTER embedding,
+    ADD COLUMN embedding_model VARCHAR(32) NULL AFTER embedding_vec,
+    ADD COLUMN embedding_norm FLOAT NULL AFTER embedding_model;
+
+-- Setelah migrate_embeddings.py selesai dan diverifikasi:
+-- ALTER TABLE users DROP COLUMN embedding;
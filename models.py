@@ -1,16 +1,18 @@
 import datetime
 from sqlalchemy import (
-    Column, Integer, String, DateTime, ForeignKey, JSON, Enum, Date, Time, Float
+    Column, Integer, String, DateTime, ForeignKey, Enum, Date, Time, Float,
+    Index, UniqueConstraint
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred, backref
 from database import Base
+from embedding_codec import PackedEmbedding
 
 class Department(Base):
     __tablename__ = "departments"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), unique=True, nullable=False)
 
-    users = relationship("User", back_populates="department")
+    users = relationship("User", back_populates="department", lazy="raise_on_sql")
 
 
 class OfficeLocation(Base):
@@ -21,7 +23,7 @@ class OfficeLocation(Base):
     longitude = Column(Float, nullable=False)
     radius_meters = Column(Integer, nullable=False)
 
-    users = relationship("User", back_populates="office_location")
+    users = relationship("User", back_populates="office_location", lazy="raise_on_sql")
 
 
 class User(Base):
@@ -30,7 +32,11 @@ class User(Base):
     user_name = Column(String(255), unique=True, index=True, nullable=False)
     password = Column(String(255), nullable=False)
     full_name = Column(String(255), nullable=False)
-    embedding = Column(JSON, nullable=True) 
+    # Embedding float32 biner (lihat embedding_codec.py), hanya dimuat saat dibutuhkan
+    embedding = deferred(Column("embedding_vec", PackedEmbedding, nullable=True))
+    embedding_model = Column(String(32), nullable=True)
+    embedding_norm = Column(Float, nullable=True)
+    embedding_version = Column(Integer, nullable=False, default=0, server_default="0")
     role = Column(Enum('admin', 'kepala_ruangan', 'staff', name='user_roles'), nullable=False)
 
     # Foreign Keys
@@ -38,14 +44,18 @@ class User(Base):
     manager_id = Column(Integer, ForeignKey("users.id"), nullable=True) 
     location_id = Column(Integer, ForeignKey("office_locations.id"), nullable=True)
 
-    # Relasi SQLAlchemy
-    department = relationship("Department", back_populates="users")
-    office_location = relationship("OfficeLocation", back_populates="users")
-    schedules = relationship("Schedule", back_populates="user")
-    attendances = relationship("Attendance", back_populates="user")
+    # Relasi SQLAlchemy. Lazy load dilarang (raise_on_sql): muat relasi secara
+    # eksplisit lewat profil di query_profiles.py supaya tidak terjadi N+1.
+    department = relationship("Department", back_populates="users", lazy="raise_on_sql")
+    office_location = relationship("OfficeLocation", back_populates="users", lazy="raise_on_sql")
+    schedules = relationship("Schedule", back_populates="user", lazy="raise_on_sql")
+    attendances = relationship("Attendance", back_populates="user", lazy="raise_on_sql")
 
     # Relasi self-referential (manager)
-    manager = relationship("User", remote_side=[id], backref="subordinates", uselist=False)
+    manager = relationship(
+        "User", remote_side=[id], backref=backref("subordinates", lazy="raise_on_sql"),
+        uselist=False, lazy="raise_on_sql",
+    )
 
 
 class Schedule(Base):
@@ -57,7 +67,11 @@ class Schedule(Base):
     end_time = Column(Time, nullable=False)
 
     # Relasi SQLAlchemy
-    user = relationship("User", back_populates="schedules")
+    user = relationship("User", back_populates="schedules", lazy="raise_on_sql")
+
+    __table_args__ = (
+        Index("ix_schedules_user_date", "user_id", "shift_date"),
+    )
 
 
 class Attendance(Base):
@@ -70,7 +84,48 @@ class Attendance(Base):
     longitude = Column(Float)
 
     # Relasi SQLAlchemy
-    user = relationship("User", back_populates="attendances")
+    user = relationship("User", back_populates="attendances", lazy="raise_on_sql")
+
+    __table_args__ = (
+        Index("ix_attendance_user_timestamp", "user_id", "timestamp"),
+    )
+
+
+class AttendanceDay(Base):
+    """
+    Status absensi per user per hari kerja (satu baris per user_id + work_date).
+    Unique key mencegah double submit yang berjalan bersamaan.
+    """
+    __tablename__ = "attendance_days"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    work_date = Column(Date, nullable=False)
+    masuk_at = Column(DateTime, nullable=True)
+    pulang_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "work_date", name="uq_attendance_days_user_date"),
+    )
+
+
+class AttendanceMonthly(Base):
+    """
+    Rekap absensi per user per bulan (month_start = tanggal 1). Diperbarui
+    inkremental saat submit absensi, dibangun ulang dengan attendance_rollup.py.
+    """
+    __tablename__ = "attendance_monthly"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    month_start = Column(Date, nullable=False)
+    days_worked = Column(Integer, nullable=False, default=0, server_default="0")
+    late_count = Column(Integer, nullable=False, default=0, server_default="0")
+    worked_minutes = Column(Integer, nullable=False, default=0, server_default="0")
+    # Hari dengan absen masuk tanpa absen pulang (termasuk shift yang sedang berjalan)
+    missing_checkouts = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "month_start", name="uq_attendance_monthly_user_month"),
+    )
 
 
 class ShiftSwapRequest(Base):
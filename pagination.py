@@ -0,0 +1,44 @@
+"""
+Keyset pagination untuk endpoint list.
+
+Halaman berikutnya diambil dengan WHERE key > cursor ORDER BY key LIMIT n
+(memakai index primary key, tanpa OFFSET yang makin lambat di halaman akhir).
+Bentuk response list tidak berubah: cursor halaman berikutnya dikirim lewat
+header X-Next-Cursor dan tidak ada jika sudah halaman terakhir.
+"""
+import base64
+import os
+from typing import Optional
+
+from fastapi import HTTPException, Response, status
+
+PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", "100"))
+PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", "1000"))
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(key: int) -> str:
+    return base64.urlsafe_b64encode(str(key).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor tidak valid.")
+
+
+def paginate(query, key_column, cursor: Optional[str], limit: int):
+    """Tambahkan filter keyset; satu baris ekstra diambil untuk tahu ada halaman berikutnya"""
+    if cursor:
+        query = query.where(key_column > decode_cursor(cursor))
+    return query.order_by(key_column).limit(limit + 1)
+
+
+def page_rows(rows, limit: int, response: Response, key: str = "id"):
+    """Potong hasil ke limit dan set header X-Next-Cursor jika masih ada baris"""
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(rows[-1], key))
+    return rows
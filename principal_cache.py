@@ -0,0 +1,102 @@
+"""
+Cache principal (user yang sedang login) per proses.
+
+get_current_user tidak lagi memuat seluruh baris User di setiap request:
+hanya kolom ringan yang dibutuhkan untuk otorisasi disimpan sebagai
+Principal, di-cache per subject token (user_name) dengan TTL pendek.
+Endpoint admin yang mengubah role/manager/lokasi memanggil invalidate()
+supaya perubahan langsung berlaku di proses ini; proses lain menyusul
+setelah TTL habis. embedding_version sengaja tidak di-cache: registrasi
+wajah berjalan di proses lain (registrasi_lokal, seed_db), jadi versinya
+dibaca bersama baris user saat verifikasi (lihat evaluate_requirements).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import User
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+
+
+class Principal:
+    """Data user yang dibutuhkan untuk otorisasi; bukan objek ORM"""
+    __slots__ = (
+        "id", "user_name", "full_name", "role", "manager_id",
+        "location_id", "department_id",
+    )
+
+    def __init__(self, id, user_name, full_name, role, manager_id, location_id, department_id):
+        self.id = id
+        self.user_name = user_name
+        self.full_name = full_name
+        self.role = role
+        self.manager_id = manager_id
+        self.location_id = location_id
+        self.department_id = department_id
+
+
+_PRINCIPAL_COLUMNS = (
+    User.id, User.user_name, User.full_name, User.role, User.manager_id,
+    User.location_id, User.department_id,
+)
+
+
+class PrincipalCache:
+    def __init__(self, ttl: float = PRINCIPAL_CACHE_TTL_SECONDS, max_entries: int = PRINCIPAL_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # user_name -> (expires_at, Principal)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, db: AsyncSession, user_name: str) -> Optional[Principal]:
+        """Ambil principal dari cache; baca dari DB jika belum ada atau sudah kedaluwarsa"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_name)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_name)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        result = await db.execute(select(*_PRINCIPAL_COLUMNS).where(User.user_name == user_name))
+        row = result.first()
+        if row is None:
+            self.invalidate(user_name)
+            return None
+
+        principal = Principal(*row)
+        with self._lock:
+            self._entries[user_name] = (now + self.ttl, principal)
+            self._entries.move_to_end(user_name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return principal
+
+    def invalidate(self, user_name: str):
+        with self._lock:
+            self._entries.pop(user_name, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,46 @@
+"""
+Profil loading bernama untuk query ORM.
+
+Semua relasi di models.py memakai lazy="raise_on_sql", jadi endpoint harus
+menyebutkan kolom dan relasi yang dibutuhkan di depan. Profil di sini
+mengumpulkan opsi tersebut per kebutuhan endpoint sehingga satu statement
+sudah cukup, misalnya:
+
+    result = await db.execute(select_profile("attendance-check").where(User.id == user_id))
+
+STATEMENT_BUDGETS berisi batas jumlah statement SQL per endpoint (termasuk
+lookup principal saat cache miss). Middleware di main.py mencatat warning
+jika batas terlewati, atau mengembalikan 500 jika DB_STATEMENT_BUDGET_STRICT=1
+(dipakai saat uji integrasi supaya regresi N+1 langsung gagal).
+"""
+import os
+
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, load_only
+
+from models import User
+
+DB_STATEMENT_BUDGET_ENABLED = os.getenv("DB_STATEMENT_BUDGET_ENABLED", "1") == "1"
+DB_STATEMENT_BUDGET_STRICT = os.getenv("DB_STATEMENT_BUDGET_STRICT", "0") == "1"
+
+PROFILES = {
+    # Persyaratan absensi: lokasi kantor dan versi embedding terbaru milik user
+    "attendance-check": (User, (
+        load_only(User.id, User.location_id, User.embedding_version),
+        joinedload(User.office_location),
+    )),
+}
+
+STATEMENT_BUDGETS = {
+    "/attendance/check-requirements": 5,
+    "/attendance/submit": 8,
+    "/manager/subordinates": 2,
+    "/manager/dashboard": 2,
+    "/manager/subordinates/{user_id}/attendances": 3,
+}
+
+
+def select_profile(name: str):
+    """select() untuk entity profil dengan opsi loading-nya"""
+    entity, options = PROFILES[name]
+    return select(entity).options(*options)
@@ -1,129 +1,128 @@
 import cv2
 import face_recognition
-import json
 import os
+import threading
 import numpy as np
 import time
-from sklearn.metrics.pairwise import cosine_similarity
 
-DB_FILE = "face_embeddings.json"
+import embedding_store
+from enrollment import fuse_embeddings
+from face_pipeline import map_location
+from face_quality import quality_score
+
+DB_FILE = "face_embeddings.bin"
+LEGACY_JSON_FILE = "face_embeddings.json"
+
+# Deteksi HOG hanya dijalankan tiap DETECT_STRIDE frame, pada salinan frame yang
+# diperkecil DETECT_SCALE; di antara deteksi, kotak wajah dibawa oleh BoxTracker.
+DETECT_STRIDE = int(os.getenv("DETECT_STRIDE", "3"))
+DETECT_SCALE = float(os.getenv("DETECT_SCALE", "0.5"))
+TRACK_MAX_AGE = 2 * DETECT_STRIDE
 
 def load_database():
-    if os.path.exists(DB_FILE):
-        with open(DB_FILE, 'r') as f:
-            return json.load(f)
-    return {}
+    # Migrasi otomatis sekali dari format JSON lama
+    if not os.path.exists(DB_FILE) and os.path.exists(LEGACY_JSON_FILE):
+        embedding_store.import_json(LEGACY_JSON_FILE, DB_FILE)
+    return embedding_store.load_database(DB_FILE)
 
-def save_database(db):
-    with open(DB_FILE, 'w') as f:
-        json.dump(db, f, indent=4)
+def save_embedding(user_name, embedding):
+    """Tambahkan satu record ke file embedding tanpa menulis ulang seluruh file"""
+    embedding_store.append_records(DB_FILE, [(user_name, embedding)])
 
-def variance_of_laplacian(image):
-    """Menghitung fokus gambar menggunakan variance of Laplacian"""
-    return cv2.Laplacian(image, cv2.CV_64F).var()
+class LatestFrameReader:
+    """
+    Thread yang terus membaca kamera dan hanya menyimpan frame terbaru, sehingga
+    loop utama tidak pernah menunggu kamera dan tidak memproses frame basi.
+    """
 
-def calculate_brightness(image):
-    """Menghitung tingkat kecerahan gambar"""
-    return np.mean(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+    def __init__(self, video_capture):
+        self.video_capture = video_capture
+        self._lock = threading.Lock()
+        self._frame = None
+        self._seq = 0
+        self._ok = True
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
 
-def calculate_contrast(image):
-    """Menghitung kontras gambar menggunakan standard deviation"""
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    return np.std(gray)
+    def start(self):
+        self._thread.start()
+        return self
 
-def is_face_centered(face_location, frame_shape):
-    """Mengecek apakah wajah berada di tengah frame"""
-    top, right, bottom, left = face_location
-    frame_h, frame_w = frame_shape[:2]
-    
-    face_center_x = (left + right) // 2
-    face_center_y = (top + bottom) // 2
-    frame_center_x = frame_w // 2
-    frame_center_y = frame_h // 2
-    
-    # Toleransi 25% dari ukuran frame
-    tolerance_x = frame_w * 0.25
-    tolerance_y = frame_h * 0.25
-    
-    return (abs(face_center_x - frame_center_x) < tolerance_x and 
-            abs(face_center_y - frame_center_y) < tolerance_y)
+    def _run(self):
+        while not self._stopped:
+            ret, frame = self.video_capture.read()
+            with self._lock:
+                self._ok = ret
+                if ret:
+                    self._frame = frame
+                    self._seq += 1
+            if not ret:
+                break
 
-def calculate_face_angle_score(landmarks):
-    """Menghitung skor berdasarkan posisi wajah (frontal lebih baik)"""
-    if not landmarks:
-        return 0
-    
-    # Ambil landmark mata dan hidung
-    left_eye = np.array(landmarks[0]['left_eye'])
-    right_eye = np.array(landmarks[0]['right_eye'])
-    nose_tip = np.array(landmarks[0]['nose_tip'])
-    
-    # Hitung simetri mata
-    eye_center = (left_eye.mean(axis=0) + right_eye.mean(axis=0)) / 2
-    nose_center = nose_tip.mean(axis=0)
-    
-    # Skor berdasarkan seberapa tengah hidung relatif terhadap mata
-    horizontal_symmetry = abs(nose_center[0] - eye_center[0])
-    
-    # Semakin kecil asymmetry, semakin bagus (frontal)
-    return max(0, 100 - horizontal_symmetry)
+    def read(self, last_seq=0, timeout=1.0):
+        """
+        Tunggu frame yang lebih baru dari last_seq; return (ok, frame, seq).
+        ok False jika kamera gagal, None jika belum ada frame baru sampai timeout.
+        """
+        deadline = time.time() + timeout
+        while True:
+            with self._lock:
+                if not self._ok:
+                    return False, None, self._seq
+                if self._frame is not None and self._seq != last_seq:
+                    return True, self._frame.copy(), self._seq
+            if time.time() > deadline:
+                return None, None, last_seq
+            time.sleep(0.002)
 
-def quality_score(frame, face_location, face_landmarks):
-    """Menghitung skor kualitas gambar secara komprehensif"""
-    top, right, bottom, left = face_location
-    
-    # ROI wajah
-    face_roi = frame[top:bottom, left:right]
-    face_roi_gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
-    
-    # Berbagai metrik kualitas
-    blur_score = variance_of_laplacian(face_roi_gray)
-    brightness = calculate_brightness(face_roi)
-    contrast = calculate_contrast(face_roi)
-    face_size = (bottom - top) * (right - left)
-    is_centered = is_face_centered(face_location, frame.shape)
-    angle_score = calculate_face_angle_score(face_landmarks)
-    
-    # Normalisasi dan bobot
-    scores = {
-        'blur': min(blur_score / 100.0, 1.0) * 30,
-        'brightness': (1 - abs(brightness - 128) / 128.0) * 20,
-        'contrast': min(contrast / 50.0, 1.0) * 15,
-        'size': min(face_size / 40000.0, 1.0) * 20,
-        'centered': 10 if is_centered else 0,
-        'angle': angle_score / 100.0 * 5
-    }
-    
-    total_score = sum(scores.values())
-    return total_score, scores
+    def stop(self):
+        self._stopped = True
+        self._thread.join(timeout=1.0)
 
-def remove_outliers(embeddings_list, threshold=0.15):
-    """Menghapus embedding yang terlalu berbeda (outlier)"""
-    if len(embeddings_list) < 3:
-        return embeddings_list
-    
-    # Hitung similarity matrix
-    similarities = []
-    for i, emb1 in enumerate(embeddings_list):
-        row_sim = []
-        for j, emb2 in enumerate(embeddings_list):
-            if i != j:
-                sim = cosine_similarity([emb1], [emb2])[0][0]
-                row_sim.append(sim)
-        if row_sim:
-            similarities.append(np.mean(row_sim))
+
+class BoxTracker:
+    """
+    Pelacak ringan: membawa kotak wajah dari deteksi terakhir ke frame berikutnya
+    dengan ekstrapolasi kecepatan antar deteksi, kadaluarsa setelah max_age frame.
+    """
+
+    def __init__(self, max_age=TRACK_MAX_AGE):
+        self.max_age = max_age
+        self.box = None
+        self.velocity = np.zeros(4)
+        self.age = 0
+
+    def update_detection(self, box, frames_since_last):
+        box = np.array(box, dtype=np.float64)
+        if self.box is not None and frames_since_last > 0:
+            self.velocity = (box - self.box) / frames_since_last
         else:
-            similarities.append(0)
-    
-    # Buang embedding dengan similarity rendah
-    good_embeddings = []
-    mean_similarity = np.mean(similarities)
-    
-    for i, sim in enumerate(similarities):
-        if sim >= mean_similarity - threshold:
-            good_embeddings.append(embeddings_list[i])
-    
-    return good_embeddings if good_embeddings else embeddings_list[:1]
+            self.velocity = np.zeros(4)
+        self.box = box
+        self.age = 0
+
+    def predict(self):
+        """Kotak (top, right, bottom, left) untuk frame saat ini, atau None"""
+        if self.box is None:
+            return None
+        self.age += 1
+        if self.age > self.max_age:
+            self.box = None
+            return None
+        self.box = self.box + self.velocity
+        return tuple(int(v) for v in self.box)
+
+    def reset(self):
+        self.box = None
+        self.velocity = np.zeros(4)
+        self.age = 0
+
+
+def detect_downscaled(frame, scale=DETECT_SCALE):
+    """Deteksi HOG pada salinan frame yang diperkecil; kotak dipetakan ke frame asli"""
+    small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    rgb_small = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+    return [map_location(loc, small.shape, frame.shape) for loc in face_recognition.face_locations(rgb_small, model="hog")]
 
 def main():
     database = load_database()
@@ -142,6 +141,8 @@ def main():
     # Set resolusi kamera untuk kualitas lebih baik
     video_capture.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
     video_capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+    reader = LatestFrameReader(video_capture).start()
+    tracker = BoxTracker()
     
     # Parameter yang ditingkatkan
     embeddings_data = []  
@@ -161,15 +162,24 @@ def main():
     last_instruction_time = time.time()
     samples_per_pose = 3
     current_pose_samples = 0
+    frame_seq = 0
+    frame_count = 0
+    last_detect_frame = 0
     
     print(f"\n🎯 Target: Kumpulkan {min_samples}-{max_samples} sampel berkualitas tinggi")
     print("📋 Instruksi akan berganti otomatis. Tekan 'q' untuk berhenti.\n")
     
     while len(embeddings_data) < max_samples:
-        ret, frame = video_capture.read()
+        ret, frame, frame_seq = reader.read(frame_seq)
+        if ret is None:
+            # Kamera lambat (frame pertama di 1280x720 atau frame tersendat): tunggu lagi
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+            continue
         if not ret:
             print("Gagal mengambil frame dari kamera.")
             break
+        frame_count += 1
 
         current_instruction = instructions[current_instruction_idx]
         
@@ -182,19 +192,31 @@ def main():
                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 255), 2)
             cv2.imshow('Video Registrasi Wajah', frame)
             cv2.waitKey(1)
+            tracker.reset()
             continue
         
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Deteksi wajah dan landmark
-        face_locations = face_recognition.face_locations(rgb_frame, model="hog")
-        face_landmarks = face_recognition.face_landmarks(rgb_frame, face_locations)
+        # Deteksi hanya tiap DETECT_STRIDE frame; frame lain memakai kotak dari tracker
+        is_candidate = False
+        face_location = None
+        if frame_count - last_detect_frame >= DETECT_STRIDE:
+            face_locations = detect_downscaled(frame)
+            if len(face_locations) == 1:
+                tracker.update_detection(face_locations[0], frame_count - last_detect_frame)
+                face_location = face_locations[0]
+                is_candidate = True
+            else:
+                tracker.reset()
+            last_detect_frame = frame_count
+        else:
+            face_location = tracker.predict()
 
-        if len(face_locations) == 1:
-            top, right, bottom, left = face_locations[0]
+        if is_candidate:
+            top, right, bottom, left = face_location
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             
-            # Hitung kualitas
-            quality, quality_breakdown = quality_score(frame, face_locations[0], face_landmarks)
+            # Landmark dan kualitas hanya dihitung untuk frame kandidat (hasil deteksi baru)
+            face_landmarks = face_recognition.face_landmarks(rgb_frame, [face_location])
+            quality, quality_breakdown = quality_score(frame, face_location, face_landmarks)
             
             # Warna kotak berdasarkan kualitas
             if quality >= min_quality_score:
@@ -224,7 +246,7 @@ def main():
             
             # Ambil sampel jika kualitas bagus
             if quality >= min_quality_score:
-                face_encodings = face_recognition.face_encodings(rgb_frame, [face_locations[0]])
+                face_encodings = face_recognition.face_encodings(rgb_frame, [face_location])
                 if face_encodings:
                     embedding = face_encodings[0]
                     embeddings_data.append({
@@ -247,6 +269,10 @@ def main():
                         current_instruction_idx = (current_instruction_idx + 1) % len(instructions)
                         current_pose_samples = 0
                         last_instruction_time = time.time()
+        elif face_location is not None:
+            # Frame antara deteksi: cukup tampilkan kotak hasil tracker
+            top, right, bottom, left = face_location
+            cv2.rectangle(frame, (left, top), (right, bottom), (200, 200, 200), 1)
         
         # Info di layar
         progress_text = f"Progress: {len(embeddings_data)}/{max_samples} | {current_instruction}"
@@ -264,6 +290,7 @@ def main():
             current_pose_samples = 0
             last_instruction_time = time.time()
 
+    reader.stop()
     video_capture.release()
     cv2.destroyAllWindows()
     
@@ -271,43 +298,22 @@ def main():
     if len(embeddings_data) >= min_samples:
         print(f"\n📊 Menganalisis {len(embeddings_data)} sampel...")
         
-        # Urutkan berdasarkan kualitas
-        embeddings_data.sort(key=lambda x: x['quality'], reverse=True)
-        
-        # Ambil embedding terbaik
-        best_embeddings = [data['embedding'] for data in embeddings_data[:12]]
-        
-        # Hapus outlier
-        filtered_embeddings = remove_outliers(best_embeddings)
-        print(f"📈 Setelah filter outlier: {len(filtered_embeddings)} sampel")
-        
-        if filtered_embeddings:
-            # Hitung embedding final dengan weighted average
-            weights = []
-            for i, emb in enumerate(filtered_embeddings):
-                # Cari kualitas asli dari embedding ini
-                quality = next((data['quality'] for data in embeddings_data 
-                              if np.array_equal(data['embedding'], emb)), 70)
-                weights.append(quality)
-            
-            weights = np.array(weights)
-            weights = weights / np.sum(weights)  # Normalisasi
-            
-            # Weighted average
-            final_embedding = np.average(filtered_embeddings, axis=0, weights=weights)
-            
-            # Simpan ke database
-            database[user_name] = final_embedding.tolist()
-            save_database(database)
-            
-            avg_quality = np.mean([data['quality'] for data in embeddings_data[:len(filtered_embeddings)]])
-            print(f"\n✅ REGISTRASI BERHASIL!")
-            print(f"👤 Nama: {user_name}")
-            print(f"📊 Sampel digunakan: {len(filtered_embeddings)}")
-            print(f"🏆 Rata-rata kualitas: {avg_quality:.1f}")
-            print(f"💾 Data disimpan ke {DB_FILE}")
-        else:
-            print("\n❌ Tidak ada embedding yang memenuhi standar kualitas.")
+        # Ambil sampel terbaik, hapus outlier, lalu weighted average berdasarkan kualitas
+        final_embedding, used = fuse_embeddings(
+            [data['embedding'] for data in embeddings_data],
+            [data['quality'] for data in embeddings_data],
+        )
+        print(f"📈 Setelah filter outlier: {len(used)} sampel")
+
+        # Simpan ke database
+        save_embedding(user_name, final_embedding)
+
+        avg_quality = np.mean([embeddings_data[i]['quality'] for i in used])
+        print(f"\n✅ REGISTRASI BERHASIL!")
+        print(f"👤 Nama: {user_name}")
+        print(f"📊 Sampel digunakan: {len(used)}")
+        print(f"🏆 Rata-rata kualitas: {avg_quality:.1f}")
+        print(f"💾 Data disimpan ke {DB_FILE}")
     else:
         print(f"\n❌ Registrasi dibatalkan. Hanya {len(embeddings_data)} sampel terkumpul (minimum {min_samples}).")
 
@@ -0,0 +1,101 @@
+"""
+Validasi roster (jadwal satu bulan) yang diunggah sekaligus.
+
+Setiap baris diparse ke ScheduleCreate, lalu diperiksa tumpang tindih
+terhadap jadwal yang sudah ada dan terhadap baris lain di upload yang sama.
+Shift dianggap interval [mulai, selesai); shift malam (end_time <= start_time)
+berakhir keesokan harinya. Jadwal yang sudah ada selalu menang: per user,
+setiap baris dicek dengan bisect terhadap jadwal lama (diurutkan berdasarkan
+waktu mulai, dengan akhir terbesar per prefix), lalu baris yang lolos
+diurutkan dan disapu sekali (O(n log n)), sehingga cukup membandingkan
+dengan akhir terbesar dari baris yang sudah diterima.
+"""
+import bisect
+import csv
+import datetime
+import io
+import itertools
+from collections import defaultdict
+
+from pydantic import ValidationError
+
+from schemas import ScheduleCreate
+
+CSV_COLUMNS = ("user_id", "shift_date", "start_time", "end_time")
+
+
+def shift_interval(shift_date: datetime.date, start_time: datetime.time, end_time: datetime.time):
+    start = datetime.datetime.combine(shift_date, start_time)
+    end = datetime.datetime.combine(shift_date, end_time)
+    if end <= start:
+        end += datetime.timedelta(days=1)  # shift malam
+    return start, end
+
+
+def parse_rows(raw_rows):
+    """
+    Parse list dict menjadi ScheduleCreate.
+    Return (list (nomor_baris, ScheduleCreate), list error per baris).
+    """
+    parsed, errors = [], []
+    for number, raw in enumerate(raw_rows, start=1):
+        try:
+            parsed.append((number, ScheduleCreate(**raw)))
+        except (ValidationError, TypeError) as e:
+            errors.append({"row": number, "detail": f"Format baris tidak valid: {_first_error(e)}"})
+    return parsed, errors
+
+
+def read_csv(contents: bytes):
+    """Baca CSV roster (header: user_id,shift_date,start_time,end_time) menjadi list dict"""
+    reader = csv.DictReader(io.StringIO(contents.decode("utf-8-sig")))
+    missing = [c for c in CSV_COLUMNS if c not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"Kolom CSV tidak lengkap: {', '.join(missing)}")
+    return [{c: (row[c] or "").strip() or None for c in CSV_COLUMNS} for row in reader]
+
+
+def find_conflicts(rows, existing):
+    """
+    rows: list (nomor_baris, ScheduleCreate) yang akan disimpan.
+    existing: list Schedule/row (user_id, shift_date, start_time, end_time) di DB.
+    Return dict nomor_baris -> pesan error untuk baris duplikat/tumpang tindih.
+    """
+    existing_by_user = defaultdict(list)
+    for s in existing:
+        existing_by_user[s.user_id].append(shift_interval(s.shift_date, s.start_time, s.end_time))
+    rows_by_user = defaultdict(list)
+    for number, s in rows:
+        start, end = shift_interval(s.shift_date, s.start_time, s.end_time)
+        rows_by_user[s.user_id].append((start, end, number))
+
+    conflicts = {}
+    for user_id, intervals in rows_by_user.items():
+        booked = sorted(existing_by_user.get(user_id, ()))
+        starts = [start for start, _ in booked]
+        # longest[i]: jadwal lama dengan waktu selesai terbesar di booked[:i + 1]
+        longest = list(itertools.accumulate(booked, lambda a, b: b if b[1] > a[1] else a))
+        latest = None  # baris diterima dengan waktu selesai terbesar
+        for start, end, number in sorted(intervals):
+            i = bisect.bisect_left(starts, end)
+            if i and longest[i - 1][1] > start:
+                conflicts[number] = _conflict_message(start, end, longest[i - 1] + (None,))
+            elif latest is not None and start < latest[1]:
+                conflicts[number] = _conflict_message(start, end, latest)
+            elif latest is None or end > latest[1]:
+                latest = (start, end, number)
+    return conflicts
+
+
+def _conflict_message(start, end, other):
+    kind = "duplikat" if (start, end) == other[:2] else "tumpang tindih"
+    source = f"baris {other[2]}" if other[2] is not None else "jadwal yang sudah ada"
+    return f"Jadwal {kind} dengan {source} ({other[0]:%Y-%m-%d %H:%M} - {other[1]:%H:%M})."
+
+
+def _first_error(error):
+    if isinstance(error, ValidationError):
+        first = error.errors()[0]
+        field = ".".join(str(part) for part in first.get("loc", ()))
+        return f"{field}: {first.get('msg')}" if field else first.get("msg")
+    return str(error)
@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
@@ -7,14 +10,27 @@ from models import User, Department, OfficeLocation
 from dependencies import role_admin_required
 from auth import get_password_hash
 from fastapi import Form
+from principal_cache import principal_cache
+import attendance_rollup
+from pagination import PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT, paginate, page_rows
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
 # ---------- Kepala Ruangan ----------
 @router.get("/heads", response_model=List[dict])
-def list_heads(db: Session = Depends(get_db), _=Depends(role_admin_required)):
-    heads = db.query(User).filter(User.role == 'kepala_ruangan').all()
+def list_heads(
+    response: Response,
+    department_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    db: Session = Depends(get_db),
+    _=Depends(role_admin_required)
+):
+    query = select(User.id, User.user_name, User.full_name).where(User.role == 'kepala_ruangan')
+    if department_id is not None:
+        query = query.where(User.department_id == department_id)
+    heads = page_rows(db.execute(paginate(query, User.id, cursor, limit)), limit, response)
     return [{"id": h.id, "user_name": h.user_name, "full_name": h.full_name} for h in heads]
 
 
@@ -41,8 +57,21 @@ def create_head(
 
 # ---------- Staff ----------
 @router.get("/staff", response_model=List[dict])
-def list_staff(db: Session = Depends(get_db), _=Depends(role_admin_required)):
-    staffs = db.query(User).filter(User.role == 'staff').all()
+def list_staff(
+    response: Response,
+    department_id: Optional[int] = None,
+    manager_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    db: Session = Depends(get_db),
+    _=Depends(role_admin_required)
+):
+    query = select(User.id, User.user_name, User.full_name, User.manager_id, User.location_id).where(User.role == 'staff')
+    if department_id is not None:
+        query = query.where(User.department_id == department_id)
+    if manager_id is not None:
+        query = query.where(User.manager_id == manager_id)
+    staffs = page_rows(db.execute(paginate(query, User.id, cursor, limit)), limit, response)
     return [{"id": s.id, "user_name": s.user_name, "full_name": s.full_name, "manager_id": s.manager_id, "location_id": s.location_id} for s in staffs]
 
 
@@ -84,13 +113,24 @@ def assign_manager(staff_id: int, manager_id: int, db: Session = Depends(get_db)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Kepala ruangan tidak ditemukan.")
     staff.manager_id = manager_id
     db.commit()
+    principal_cache.invalidate(staff.user_name)
     return {"message": "Assign manager berhasil."}
 
 
 # ---------- Office Locations ----------
 @router.get("/locations", response_model=List[dict])
-def list_locations(db: Session = Depends(get_db), _=Depends(role_admin_required)):
-    locs = db.query(OfficeLocation).all()
+def list_locations(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    db: Session = Depends(get_db),
+    _=Depends(role_admin_required)
+):
+    query = select(
+        OfficeLocation.id, OfficeLocation.location_name, OfficeLocation.latitude,
+        OfficeLocation.longitude, OfficeLocation.radius_meters,
+    )
+    locs = page_rows(db.execute(paginate(query, OfficeLocation.id, cursor, limit)), limit, response)
     return [{"id": l.id, "location_name": l.location_name, "latitude": l.latitude, "longitude": l.longitude, "radius_meters": l.radius_meters} for l in locs]
 
 
@@ -101,3 +141,27 @@ def create_location(location_name: str, latitude: float, longitude: float, radiu
     db.commit()
     db.refresh(new)
     return {"message": "Lokasi kantor berhasil dibuat.", "id": new.id}
+
+
+# ---------- Laporan ----------
+@router.get("/reports/monthly")
+def monthly_report_all(
+    year: int,
+    month: int,
+    department_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    _=Depends(role_admin_required)
+):
+    """Rekap bulanan seluruh staff (untuk payroll), opsional per departemen."""
+    try:
+        month_start = datetime.date(year, month, 1)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tahun atau bulan tidak valid.")
+    query = attendance_rollup.report_query(month_start)
+    if department_id is not None:
+        query = query.where(User.department_id == department_id)
+    return [attendance_rollup.report_row(row) for row in db.execute(query)]
+
+
+# ---------- Monitoring ----------
+# Statistik inference, pool DB dan /metrics ada di routes/monitoring.py
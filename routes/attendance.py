@@ -1,47 +1,189 @@
+import asyncio
 import datetime
+import hmac
 import io
-from typing import Any
+import os
+import time
+from typing import Any, Optional
 
 import numpy as np
-import cv2
-import face_recognition
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Form, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from fastapi.responses import StreamingResponse
-
-from database import get_db
-from models import Attendance, Schedule, User
-from dependencies import get_current_user
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Form, Header, WebSocket, WebSocketDisconnect, status
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal, get_async_db
+from models import Attendance, AttendanceDay, Schedule, User
+from dependencies import authenticate_token, get_current_user
+from principal_cache import Principal
+from query_profiles import select_profile
 from utils import haversine_distance
+import attendance_rollup
+import metrics
+from embedding_cache import embedding_cache
+from embedding_index import embedding_index
+import face_results
+from face_results import gate_stats, RETRY_HINTS
+from inference import face_batcher, InferenceBusy, InferenceTimeout, INFERENCE_RETRY_AFTER_SECONDS
 
 router = APIRouter(prefix="/attendance", tags=["attendance"])
 
+FACE_MATCH_TOLERANCE = 0.5
+# /attendance/identify mewajibkan header X-Kiosk-Key dengan nilai ini; jika
+# tidak diisi, endpoint kiosk dinonaktifkan (503)
+KIOSK_API_KEY = os.getenv("KIOSK_API_KEY")
 
-@router.post("/check-requirements")
-async def check_attendance_requirements(
-    attendance_type: str = Form(...),
-    latitude: float = Form(...),
-    longitude: float = Form(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> Any:
+# Verifikasi streaming (/attendance/ws/verify): selesai setelah N frame berturut-turut cocok
+STREAM_VERIFY_CONSECUTIVE = int(os.getenv("STREAM_VERIFY_CONSECUTIVE", "3"))
+STREAM_VERIFY_MAX_FRAMES = int(os.getenv("STREAM_VERIFY_MAX_FRAMES", "40"))
+STREAM_VERIFY_TIMEOUT_SECONDS = float(os.getenv("STREAM_VERIFY_TIMEOUT_SECONDS", "30"))
+STREAM_FRAME_MAX_BYTES = int(os.getenv("STREAM_FRAME_MAX_BYTES", str(200 * 1024)))
+
+# Ukuran crop wajah yang dikirim browser (lihat /attendance/capture-config)
+CAPTURE_SIZE = int(os.getenv("CAPTURE_SIZE", "320"))
+CAPTURE_FACE_MARGIN = float(os.getenv("CAPTURE_FACE_MARGIN", "0.4"))
+CAPTURE_JPEG_QUALITY = float(os.getenv("CAPTURE_JPEG_QUALITY", "0.85"))
+
+
+async def encode_uploaded_face(file: UploadFile) -> np.ndarray:
     """
-    Endpoint untuk verifikasi persyaratan absensi sebelum verifikasi wajah:
-    - Role check
-    - Schedule check
-    - Time check
-    - Location check
-    - Previous attendance check
+    Jalankan decode + deteksi + encoding di inference engine (di luar event loop,
+    lewat micro-batcher) dan terjemahkan hasilnya ke HTTPException yang sesuai.
+    """
+    with metrics.stage("read"):
+        contents = await file.read()
+    if not contents:
+        metrics.set_outcome(face_results.STATUS_INVALID_IMAGE)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File gambar kosong.")
+    start = time.perf_counter()
+    try:
+        result, embedding, info = await face_batcher.submit(contents)
+    except InferenceBusy:
+        metrics.set_outcome("busy")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server verifikasi wajah sedang sibuk. Silakan coba lagi.",
+            headers={"Retry-After": str(INFERENCE_RETRY_AFTER_SECONDS)},
+        )
+    except InferenceTimeout:
+        metrics.set_outcome("timeout")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Verifikasi wajah melebihi batas waktu. Silakan coba lagi.",
+            headers={"Retry-After": str(INFERENCE_RETRY_AFTER_SECONDS)},
+        )
+    metrics.record_inference(info, len(contents), time.perf_counter() - start)
+
+    if result in (face_results.STATUS_OK, face_results.STATUS_REJECTED):
+        gate_stats.record(info.get("reason"), info["stages"])
+    if result != face_results.STATUS_OK:
+        metrics.set_outcome(result)
+
+    if result == face_results.STATUS_INVALID_IMAGE:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File gambar tidak valid atau tidak dapat dibaca.")
+    if result == face_results.STATUS_NO_FACE:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Wajah tidak terdeteksi di gambar.")
+    if result == face_results.STATUS_REJECTED:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=RETRY_HINTS[info["reason"]])
+    return embedding
+
+
+async def record_attendance(
+    db: AsyncSession,
+    user_id: int,
+    attendance_type: str,
+    latitude: float,
+    longitude: float,
+    shift_start: Optional[datetime.time] = None,
+) -> Attendance:
+    """
+    Simpan event absensi, status harian dan rekap bulanan dalam satu transaksi.
+    Double submit yang berjalan bersamaan ditolak oleh database (unique key /
+    update bersyarat), sehingga rekap tidak terhitung dua kali.
+    """
+    today = datetime.date.today()
+    now = datetime.datetime.utcnow()
+    new_attendance = Attendance(
+        user_id=user_id,
+        attendance_type=attendance_type,
+        timestamp=now,
+        latitude=latitude,
+        longitude=longitude
+    )
+    db.add(new_attendance)
+
+    if attendance_type == "masuk":
+        db.add(AttendanceDay(user_id=user_id, work_date=today, masuk_at=now))
+        late = shift_start is not None and attendance_rollup.is_late(
+            datetime.datetime.combine(today, shift_start), datetime.datetime.now()
+        )
+        try:
+            await db.flush()
+            await db.execute(attendance_rollup.masuk_statement(user_id, today, late))
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Anda sudah melakukan absen masuk hari ini.")
+    else:
+        result = await db.execute(
+            update(AttendanceDay)
+            .where(
+                AttendanceDay.user_id == user_id,
+                AttendanceDay.work_date == today,
+                AttendanceDay.masuk_at.isnot(None),
+                AttendanceDay.pulang_at.is_(None)
+            )
+            .values(pulang_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Anda sudah melakukan absen pulang hari ini.")
+        await db.execute(attendance_rollup.pulang_statement(user_id, today))
+        await db.commit()
+
+    return new_attendance
+
+
+@router.get("/capture-config")
+async def capture_config() -> Any:
+    """
+    Parameter capture untuk client: wajah di-crop (kotak wajah + margin per sisi),
+    diskalakan ke width x height dan dikirim sebagai JPEG dengan kualitas ini.
+    Crop bersifat best-effort: browser tanpa FaceDetector mengirim frame utuh
+    selebar width (rasio asli), dan wajah tetap dideteksi di mana pun di server.
+    """
+    return {
+        "width": CAPTURE_SIZE,
+        "height": CAPTURE_SIZE,
+        "face_margin": CAPTURE_FACE_MARGIN,
+        "jpeg_quality": CAPTURE_JPEG_QUALITY,
+        "max_frame_bytes": STREAM_FRAME_MAX_BYTES,
+    }
+
+
+async def evaluate_requirements(
+    db: AsyncSession,
+    current_user: Principal,
+    attendance_type: str,
+    latitude: float,
+    longitude: float,
+):
+    """
+    Cek persyaratan absensi (raise HTTPException jika gagal).
+    Return (schedule hari ini, embedding wajah terdaftar). Versi embedding
+    dibaca dari baris user saat ini, bukan dari Principal yang di-cache,
+    sehingga registrasi ulang wajah langsung berlaku.
     """
     if current_user.role != "staff":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Hanya staff yang bisa melakukan absensi.")
 
     today = datetime.date.today()
-    schedule = db.query(Schedule).filter(
+    result = await db.execute(select(Schedule).where(
         Schedule.user_id == current_user.id,
         Schedule.shift_date == today
-    ).first()
+    ))
+    schedule = result.scalars().first()
 
     if not schedule:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Anda tidak memiliki jadwal kerja hari ini ({today}).")
@@ -74,7 +216,9 @@ async def check_attendance_requirements(
     else:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Jenis absensi tidak valid. Gunakan 'masuk' atau 'pulang'.")
 
-    office_location = current_user.office_location
+    result = await db.execute(select_profile("attendance-check").where(User.id == current_user.id))
+    user = result.scalars().first()
+    office_location = user.office_location if user else None
     if not office_location:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Lokasi kantor Anda belum diatur. Hubungi admin.")
 
@@ -85,29 +229,47 @@ async def check_attendance_requirements(
             detail=f"Anda berada di luar jangkauan lokasi kantor ({int(distance)} meter)."
         )
 
-    today_attendance = db.query(Attendance).filter(
-        Attendance.user_id == current_user.id,
-        func.date(Attendance.timestamp) == today
-    ).order_by(Attendance.timestamp.desc()).all()
+    # Satu point lookup lewat unique key (user_id, work_date)
+    result = await db.execute(select(AttendanceDay).where(
+        AttendanceDay.user_id == current_user.id,
+        AttendanceDay.work_date == today
+    ))
+    attendance_day = result.scalars().first()
 
     if attendance_type == "masuk":
-        masuk_attendance = [a for a in today_attendance if a.attendance_type == "masuk"]
-        if masuk_attendance:
+        if attendance_day and attendance_day.masuk_at:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Anda sudah melakukan absen masuk hari ini.")
     
     elif attendance_type == "pulang":
-        masuk_attendance = [a for a in today_attendance if a.attendance_type == "masuk"]
-        pulang_attendance = [a for a in today_attendance if a.attendance_type == "pulang"]
-        
-        if not masuk_attendance:
+        if not attendance_day or not attendance_day.masuk_at:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Anda harus absen masuk terlebih dahulu.")
         
-        if pulang_attendance:
+        if attendance_day.pulang_at:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Anda sudah melakukan absen pulang hari ini.")
 
-    if not current_user.embedding:
+    known_embedding = await embedding_cache.get(db, current_user.id, user.embedding_version)
+    if known_embedding is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Wajah Anda belum terdaftar. Hubungi admin.")
+    return schedule, known_embedding
 
+
+@router.post("/check-requirements")
+async def check_attendance_requirements(
+    attendance_type: str = Form(...),
+    latitude: float = Form(...),
+    longitude: float = Form(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+) -> Any:
+    """
+    Endpoint untuk verifikasi persyaratan absensi sebelum verifikasi wajah:
+    - Role check
+    - Schedule check
+    - Time check
+    - Location check
+    - Previous attendance check
+    """
+    schedule, _ = await evaluate_requirements(db, current_user, attendance_type, latitude, longitude)
     return {
         "status": "requirements_met",
         "message": "Semua persyaratan terpenuhi. Silakan lanjut ke verifikasi wajah.",
@@ -125,46 +287,34 @@ async def submit_attendance(
     attendance_type: str = Form(...),
     latitude: float = Form(...),
     longitude: float = Form(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ) -> Any:
     """
     Endpoint untuk submit absensi setelah verifikasi wajah
     """
     try:
-        await check_attendance_requirements(attendance_type, latitude, longitude, db, current_user)
+        with metrics.stage("requirements"):
+            schedule, known_embedding = await evaluate_requirements(
+                db, current_user, attendance_type, latitude, longitude
+            )
     except HTTPException as e:
+        metrics.set_outcome("requirements_failed")
         raise e
 
-    contents = await file.read()
-    image_array = np.frombuffer(contents, np.uint8)
-    image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
-    if image is None:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File gambar tidak valid atau tidak dapat dibaca.")
-
-    rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-
-    face_locations = face_recognition.face_locations(rgb_image)
-    if not face_locations:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Wajah tidak terdeteksi di gambar.")
-
-    unknown_embedding = face_recognition.face_encodings(rgb_image, face_locations)[0]
-    known_embedding = np.array(current_user.embedding)
-
-    is_match = face_recognition.compare_faces([known_embedding], unknown_embedding, tolerance=0.5)[0]
+    unknown_embedding = await encode_uploaded_face(file)
+    with metrics.stage("match"):
+        # Sama dengan face_recognition.compare_faces: jarak euclidean <= tolerance
+        is_match = np.linalg.norm(known_embedding - unknown_embedding) <= FACE_MATCH_TOLERANCE
     if not is_match:
+        metrics.set_outcome("no_match")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Verifikasi wajah gagal.")
+    metrics.set_outcome("match")
 
-    # Simpan absensi
-    new_attendance = Attendance(
-        user_id=current_user.id,
-        attendance_type=attendance_type,
-        latitude=latitude,
-        longitude=longitude
-    )
-    db.add(new_attendance)
-    db.commit()
-    db.refresh(new_attendance)
+    with metrics.stage("commit"):
+        new_attendance = await record_attendance(
+            db, current_user.id, attendance_type, latitude, longitude, shift_start=schedule.start_time
+        )
 
     return {
         "status": "success",
@@ -179,10 +329,250 @@ async def check_attendance_legacy(
     file: UploadFile = File(...),
     latitude: float = Form(...),
     longitude: float = Form(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ) -> Any:
     """
     Legacy endpoint - redirect ke submit dengan attendance_type masuk
     """
-    return await submit_attendance(file, "masuk", latitude, longitude, db, current_user)
\ No newline at end of file
+    return await submit_attendance(file, "masuk", latitude, longitude, db, current_user)
+
+
+@router.post("/identify")
+async def identify_face(
+    file: UploadFile = File(...),
+    x_kiosk_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+) -> Any:
+    """
+    Mode kiosk (tanpa login, dengan X-Kiosk-Key): identifikasi 1:N wajah pada
+    gambar terhadap semua embedding yang terdaftar. Hanya user yang cocok yang
+    dikembalikan; kandidat lain dan jaraknya tidak pernah dibuka.
+    """
+    if not KIOSK_API_KEY:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Mode kiosk tidak diaktifkan.")
+    if not hmac.compare_digest((x_kiosk_key or "").encode(), KIOSK_API_KEY.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Kiosk key tidak valid.")
+
+    unknown_embedding = await encode_uploaded_face(file)
+
+    with metrics.stage("match"):
+        await embedding_index.refresh_if_stale(db)
+        candidates = embedding_index.search(unknown_embedding, k=1)
+
+    if not candidates or candidates[0][1] > FACE_MATCH_TOLERANCE:
+        metrics.set_outcome("no_match")
+        return {"status": "no_match"}
+
+    user_id, distance = candidates[0]
+    result = await db.execute(select(User.id, User.user_name, User.full_name).where(User.id == user_id))
+    user = result.first()
+    if user is None:
+        metrics.set_outcome("no_match")
+        return {"status": "no_match"}
+    metrics.set_outcome("match")
+
+    return {
+        "status": "match",
+        "user_id": user.id,
+        "user_name": user.user_name,
+        "full_name": user.full_name,
+        "distance": distance,
+    }
+
+
+class FrameSlot:
+    """
+    Menyimpan hanya frame terbaru dari client. Frame yang datang saat frame
+    sebelumnya belum diproses menggantikannya (dihitung sebagai dropped),
+    sehingga server tidak pernah tertinggal lebih dari satu frame.
+    """
+
+    def __init__(self):
+        self.frame: Optional[bytes] = None
+        self.dropped = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+
+    def put(self, frame: bytes):
+        if self.frame is not None:
+            self.dropped += 1
+        self.frame = frame
+        self._ready.set()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    async def take(self) -> Optional[bytes]:
+        """Tunggu frame berikutnya; None jika client sudah menutup koneksi"""
+        await self._ready.wait()
+        if not self.closed:
+            self._ready.clear()
+        frame, self.frame = self.frame, None
+        return frame
+
+
+async def _receive_frames(websocket: WebSocket, slot: FrameSlot):
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            data = message.get("bytes")
+            if not data:
+                continue
+            if len(data) > STREAM_FRAME_MAX_BYTES:
+                slot.dropped += 1
+                continue
+            slot.put(data)
+    finally:
+        slot.close()
+
+
+async def match_frame(contents: bytes, known_embedding: np.ndarray):
+    """
+    Encode satu frame dan bandingkan dengan embedding terdaftar.
+    Return (hasil, jarak, hint); hasil: match, no_match, no_face, rejected atau busy.
+    """
+    if not contents:
+        return "rejected", None, "Frame kosong."
+    start = time.perf_counter()
+    try:
+        result, embedding, info = await face_batcher.submit(contents)
+    except (InferenceBusy, InferenceTimeout):
+        return "busy", None, "Server sedang sibuk, frame dilewati."
+    metrics.record_inference(info, len(contents), time.perf_counter() - start)
+
+    if result in (face_results.STATUS_OK, face_results.STATUS_REJECTED):
+        gate_stats.record(info.get("reason"), info["stages"])
+
+    if result == face_results.STATUS_INVALID_IMAGE:
+        return "rejected", None, "Frame tidak dapat dibaca."
+    if result == face_results.STATUS_NO_FACE:
+        return "no_face", None, "Wajah tidak terdeteksi. Posisikan wajah di tengah kamera."
+    if result == face_results.STATUS_REJECTED:
+        return "rejected", None, RETRY_HINTS[info["reason"]]
+
+    with metrics.stage("match"):
+        distance = float(np.linalg.norm(known_embedding - embedding))
+    if distance <= FACE_MATCH_TOLERANCE:
+        return "match", distance, None
+    return "no_match", distance, "Wajah belum cocok. Tahan posisi dan pastikan pencahayaan cukup."
+
+
+async def _verify_frames(websocket: WebSocket, slot: FrameSlot, known_embedding: np.ndarray) -> bool:
+    """Proses frame sampai N frame berturut-turut cocok (True), batas frame atau batas waktu"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_VERIFY_TIMEOUT_SECONDS
+    frames = consecutive = 0
+    while frames < STREAM_VERIFY_MAX_FRAMES:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return False
+        try:
+            frame = await asyncio.wait_for(slot.take(), remaining)
+        except asyncio.TimeoutError:
+            return False
+        if frame is None:
+            raise WebSocketDisconnect()
+
+        frames += 1
+        timer = metrics.start_timer("/attendance/ws/verify")
+        outcome, distance, hint = await match_frame(frame, known_embedding)
+        metrics.finish(timer, outcome=outcome)
+        if outcome == "match":
+            consecutive += 1
+        elif outcome != "busy":
+            # Frame yang dilewati karena server sibuk tidak memutus rangkaian
+            consecutive = 0
+        if consecutive >= STREAM_VERIFY_CONSECUTIVE:
+            return True
+
+        await websocket.send_json({
+            "status": "progress",
+            "result": outcome,
+            "distance": distance,
+            "consecutive": consecutive,
+            "required": STREAM_VERIFY_CONSECUTIVE,
+            "frames": frames,
+            "dropped": slot.dropped,
+            "hint": hint,
+        })
+    return False
+
+
+@router.websocket("/ws/verify")
+async def stream_verify(websocket: WebSocket):
+    """
+    Verifikasi wajah streaming. Client mengirim pesan JSON pertama
+    {token, attendance_type, latitude, longitude}, lalu frame JPEG kecil
+    sebagai pesan biner. Server membalas progress per frame dan menyimpan
+    absensi begitu STREAM_VERIFY_CONSECUTIVE frame berturut-turut cocok.
+    """
+    await websocket.accept()
+    try:
+        try:
+            init = await asyncio.wait_for(websocket.receive_json(), STREAM_VERIFY_TIMEOUT_SECONDS)
+            attendance_type = str(init["attendance_type"])
+            latitude = float(init["latitude"])
+            longitude = float(init["longitude"])
+        except (asyncio.TimeoutError, KeyError, TypeError, ValueError):
+            await websocket.send_json({"status": "error", "detail": "Pesan awal tidak valid."})
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+
+        # Session DB hanya dipakai saat persiapan dan saat menyimpan, tidak ditahan selama streaming
+        async with AsyncSessionLocal() as db:
+            current_user = await authenticate_token(db, init.get("token") or "")
+            if current_user is None:
+                await websocket.send_json({"status": "error", "detail": "Could not validate credentials"})
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                return
+            try:
+                schedule, known_embedding = await evaluate_requirements(
+                    db, current_user, attendance_type, latitude, longitude
+                )
+            except HTTPException as e:
+                await websocket.send_json({"status": "error", "detail": e.detail})
+                await websocket.close()
+                return
+
+        await websocket.send_json({
+            "status": "ready",
+            "required": STREAM_VERIFY_CONSECUTIVE,
+            "max_frames": STREAM_VERIFY_MAX_FRAMES,
+            "max_frame_bytes": STREAM_FRAME_MAX_BYTES,
+        })
+
+        slot = FrameSlot()
+        receiver = asyncio.create_task(_receive_frames(websocket, slot))
+        try:
+            verified = await _verify_frames(websocket, slot, known_embedding)
+        finally:
+            receiver.cancel()
+
+        if not verified:
+            await websocket.send_json({"status": "failed", "detail": "Verifikasi wajah gagal."})
+            await websocket.close()
+            return
+
+        async with AsyncSessionLocal() as db:
+            try:
+                new_attendance = await record_attendance(
+                    db, current_user.id, attendance_type, latitude, longitude, shift_start=schedule.start_time
+                )
+            except HTTPException as e:
+                await websocket.send_json({"status": "error", "detail": e.detail})
+                await websocket.close()
+                return
+
+        await websocket.send_json({
+            "status": "success",
+            "user_name": current_user.full_name,
+            "attendance_type": attendance_type,
+            "timestamp": new_attendance.timestamp.isoformat(),
+        })
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
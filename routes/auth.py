@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
+from database import get_async_db
 from models import User
 from schemas import Token
 from auth import verify_password, create_access_token
@@ -11,13 +13,15 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/login", response_model=Token)
-def login_for_access_token(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
+async def login_for_access_token(db: AsyncSession = Depends(get_async_db), form_data: OAuth2PasswordRequestForm = Depends()):
     """
     Endpoint untuk login dan menghasilkan JWT access token.
     """
-    user = db.query(User).filter(User.user_name == form_data.username).first()
+    result = await db.execute(select(User).where(User.user_name == form_data.username))
+    user = result.scalars().first()
 
-    if not user or not verify_password(form_data.password, user.password):
+    # bcrypt sengaja lambat; jalankan di threadpool agar tidak memblokir event loop
+    if not user or not await run_in_threadpool(verify_password, form_data.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -0,0 +1,189 @@
+"""
+Export absensi untuk payroll (CSV atau Parquet).
+
+Baris dibaca dengan server-side cursor per chunk dan langsung ditulis ke
+response, sehingga memori tetap konstan berapa pun rentang tanggalnya.
+Rentang tanggal dan jadwal memakai waktu lokal server; timestamp absensi
+disimpan dalam UTC.
+Parquet membutuhkan pyarrow (ada di requirements.txt); instalasi tanpa pyarrow
+hanya melayani CSV dan menolak format parquet dengan 400.
+"""
+import csv
+import datetime
+import io
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
+
+import attendance_rollup
+from database import AsyncSessionLocal
+from dependencies import get_current_user
+from models import Attendance, AttendanceDay, Department, Schedule, User
+from principal_cache import Principal
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # tanpa pyarrow hanya CSV
+    pa = pq = None
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+EXPORT_COLUMNS = (
+    "attendance_id", "user_id", "user_name", "full_name", "department", "attendance_type",
+    "timestamp", "latitude", "longitude", "shift_date", "shift_start", "shift_end",
+)
+
+
+def export_query(start_date: datetime.date, end_date: datetime.date, department_id, manager_id):
+    # Batas tengah malam lokal dikonversi ke UTC agar index (user_id, timestamp) tetap terpakai
+    utc_offset = attendance_rollup.local_utc_offset()
+    start_at = datetime.datetime.combine(start_date, datetime.time.min) - utc_offset
+    end_at = datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time.min) - utc_offset
+    query = (
+        select(
+            Attendance.id.label("attendance_id"), User.id.label("user_id"), User.user_name, User.full_name,
+            Department.name.label("department"), Attendance.attendance_type, Attendance.timestamp,
+            Attendance.latitude, Attendance.longitude, Schedule.shift_date,
+            Schedule.start_time.label("shift_start"), Schedule.end_time.label("shift_end"),
+        )
+        .join(User, User.id == Attendance.user_id)
+        .outerjoin(Department, Department.id == User.department_id)
+        # Jadwal diambil dari hari kerja lokal (attendance_days.work_date) event ini,
+        # sehingga absen pulang shift malam tetap masuk ke jadwal hari masuknya
+        .outerjoin(AttendanceDay, and_(
+            AttendanceDay.user_id == Attendance.user_id,
+            or_(AttendanceDay.masuk_at == Attendance.timestamp, AttendanceDay.pulang_at == Attendance.timestamp),
+        ))
+        .outerjoin(Schedule, and_(
+            Schedule.user_id == Attendance.user_id,
+            Schedule.shift_date == AttendanceDay.work_date,
+        ))
+        .where(Attendance.timestamp >= start_at, Attendance.timestamp < end_at)
+        .order_by(Attendance.timestamp, Attendance.id)
+    )
+    if department_id is not None:
+        query = query.where(User.department_id == department_id)
+    if manager_id is not None:
+        query = query.where(User.manager_id == manager_id)
+    return query.execution_options(yield_per=EXPORT_CHUNK_SIZE)
+
+
+async def stream_partitions(query):
+    """Baca hasil query per chunk dengan server-side cursor di session sendiri"""
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query)
+        async for rows in result.partitions(EXPORT_CHUNK_SIZE):
+            yield rows
+
+
+async def csv_chunks(query):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    async for rows in stream_partitions(query):
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink:
+    """File-like untuk ParquetWriter: byte yang ditulis diambil per row group"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema():
+    return pa.schema([
+        ("attendance_id", pa.int64()), ("user_id", pa.int64()), ("user_name", pa.string()),
+        ("full_name", pa.string()), ("department", pa.string()), ("attendance_type", pa.string()),
+        ("timestamp", pa.timestamp("us")), ("latitude", pa.float64()), ("longitude", pa.float64()),
+        ("shift_date", pa.date32()), ("shift_start", pa.time64("us")), ("shift_end", pa.time64("us")),
+    ])
+
+
+async def parquet_chunks(query):
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    async for rows in stream_partitions(query):
+        columns = list(zip(*rows))
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+        ))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+@router.get("/attendance")
+async def export_attendance(
+    start_date: datetime.date = Query(...),
+    end_date: datetime.date = Query(...),
+    department_id: Optional[int] = Query(None),
+    format: str = Query("csv"),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Export absensi (join users, departemen dan jadwal hari itu) untuk rentang tanggal.
+    Admin dapat mengekspor semua staff; kepala_ruangan hanya bawahannya.
+    format: csv atau parquet.
+    """
+    if current_user.role == "admin":
+        manager_id = None
+    elif current_user.role == "kepala_ruangan":
+        manager_id = current_user.id
+    else:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Manager or Admin role required")
+
+    if end_date < start_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tanggal akhir harus setelah tanggal awal.")
+
+    query = export_query(start_date, end_date, department_id, manager_id)
+    filename = f"absensi_{start_date}_{end_date}"
+
+    if format == "csv":
+        return StreamingResponse(
+            csv_chunks(query),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.csv"'},
+        )
+    if format == "parquet":
+        if pq is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Format parquet membutuhkan pyarrow di server.")
+        return StreamingResponse(
+            parquet_chunks(query),
+            media_type="application/vnd.apache.parquet",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.parquet"'},
+        )
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Format tidak valid. Gunakan 'csv' atau 'parquet'.")
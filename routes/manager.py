@@ -1,25 +1,44 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import and_, select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 import datetime
+import os
 
-from database import get_db
+from database import get_db, get_async_db
 from dependencies import get_current_user, role_manager_or_admin_required
-from models import User, Attendance, Schedule
+from principal_cache import Principal
+from pagination import PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT, paginate, page_rows
+from models import User, Attendance, AttendanceDay, Department, Schedule
+import attendance_rollup
 from fastapi import Response, Form
 
 router = APIRouter(prefix="/manager", tags=["manager"])
 
+# Batas pulang sama dengan jendela absen pulang di /attendance/check-requirements
+CHECKOUT_WINDOW = datetime.timedelta(hours=1)
+DASHBOARD_MAX_DAYS = int(os.getenv("DASHBOARD_MAX_DAYS", "92"))
+
 
 @router.get("/subordinates", response_model=List[dict])
-def list_subordinates(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(role_manager_or_admin_required)
+async def list_subordinates(
+    response: Response,
+    department_id: Optional[int] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(role_manager_or_admin_required)
 ):
     """
-    List semua staff yang berada di bawah kepala_ruangan saat ini.
+    List staff yang berada di bawah kepala_ruangan saat ini (per halaman, lihat X-Next-Cursor).
     """
-    subs = db.query(User).filter(User.manager_id == current_user.id).all()
+    query = select(User.id, User.user_name, User.full_name, User.role, User.department_id).where(
+        User.manager_id == current_user.id
+    )
+    if department_id is not None:
+        query = query.where(User.department_id == department_id)
+    subs = page_rows(await db.execute(paginate(query, User.id, cursor, limit)), limit, response)
     result = []
     for s in subs:
         result.append({
@@ -33,39 +52,44 @@ def list_subordinates(
 
 
 @router.get("/subordinates/{user_id}/attendances")
-def get_subordinate_attendances(
+async def get_subordinate_attendances(
     user_id: int,
     year: Optional[int] = Query(None),
     month: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(role_manager_or_admin_required)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(role_manager_or_admin_required)
 ):
     """
     Mendapatkan daftar absensi untuk subordinate tertentu dalam rentang bulan/tahun tertentu.
     Jika year/month tidak diberikan, return 30 hari terakhir.
     """
 
-    subordinate = db.query(User).filter(User.id == user_id, User.manager_id == current_user.id).first()
-    if not subordinate:
+    result = await db.execute(select(User.id).where(User.id == user_id, User.manager_id == current_user.id))
+    if result.first() is None:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User bukan bawahan Anda atau tidak ditemukan.")
 
-    query = db.query(Attendance).filter(Attendance.user_id == user_id)
+    query = select(Attendance).where(Attendance.user_id == user_id)
 
     if year and month:
         try:
             start_date = datetime.date(year, month, 1)
             if month == 12:
-                end_date = datetime.date(year + 1, 1, 1) - datetime.timedelta(days=1)
+                end_date = datetime.date(year + 1, 1, 1)
             else:
-                end_date = datetime.date(year, month + 1, 1) - datetime.timedelta(days=1)
-            query = query.filter(db.func.date(Attendance.timestamp) >= start_date, db.func.date(Attendance.timestamp) <= end_date)
+                end_date = datetime.date(year, month + 1, 1)
         except ValueError:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tahun atau bulan tidak valid.")
+        # Rentang timestamp (bukan DATE(timestamp)) agar index (user_id, timestamp) terpakai
+        query = query.where(
+            Attendance.timestamp >= datetime.datetime.combine(start_date, datetime.time.min),
+            Attendance.timestamp < datetime.datetime.combine(end_date, datetime.time.min)
+        )
     else:
         cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=30)
-        query = query.filter(Attendance.timestamp >= cutoff)
+        query = query.where(Attendance.timestamp >= cutoff)
 
-    records = query.order_by(Attendance.timestamp.desc()).all()
+    result = await db.execute(query.order_by(Attendance.timestamp.desc()))
+    records = result.scalars().all()
     res = []
     for r in records:
         res.append({
@@ -77,6 +101,127 @@ def get_subordinate_attendances(
     return res
 
 
+def shift_status(shift_start, shift_end, masuk_at, pulang_at, now):
+    """Status satu shift (waktu lokal): hadir/terlambat/tidak_hadir/belum_mulai, plus flag tanpa pulang"""
+    if masuk_at is None:
+        if now < shift_start + datetime.timedelta(minutes=30):
+            return "belum_mulai", None, False
+        return "tidak_hadir", None, False
+
+    late_minutes = attendance_rollup.late_minutes(shift_start, masuk_at)
+    late = attendance_rollup.is_late(shift_start, masuk_at)
+    missing_checkout = pulang_at is None and now > shift_end + CHECKOUT_WINDOW
+    return ("terlambat" if late else "hadir"), max(late_minutes, 0), missing_checkout
+
+
+@router.get("/dashboard")
+async def team_dashboard(
+    start_date: Optional[datetime.date] = Query(None),
+    end_date: Optional[datetime.date] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(role_manager_or_admin_required)
+):
+    """
+    Rekap tim dalam satu query: jadwal setiap bawahan pada rentang tanggal
+    digabung dengan status absensi harian (attendance_days), termasuk
+    keterlambatan dan absen pulang yang terlewat.
+    Default rentang: awal bulan ini sampai hari ini.
+    """
+    today = datetime.date.today()
+    start_date = start_date or today.replace(day=1)
+    end_date = end_date or today
+    if end_date < start_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tanggal akhir harus setelah tanggal awal.")
+    if (end_date - start_date).days >= DASHBOARD_MAX_DAYS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Rentang maksimal {DASHBOARD_MAX_DAYS} hari.")
+
+    query = (
+        select(
+            User.id, User.user_name, User.full_name, Department.name.label("department_name"),
+            Schedule.shift_date, Schedule.start_time, Schedule.end_time,
+            AttendanceDay.masuk_at, AttendanceDay.pulang_at,
+        )
+        .select_from(User)
+        .outerjoin(Department, Department.id == User.department_id)
+        .outerjoin(Schedule, and_(
+            Schedule.user_id == User.id,
+            Schedule.shift_date >= start_date,
+            Schedule.shift_date <= end_date,
+        ))
+        .outerjoin(AttendanceDay, and_(
+            AttendanceDay.user_id == Schedule.user_id,
+            AttendanceDay.work_date == Schedule.shift_date,
+        ))
+        .where(User.manager_id == current_user.id)
+        .order_by(User.full_name, User.id, Schedule.shift_date, Schedule.start_time)
+    )
+    result = await db.execute(query)
+
+    # masuk_at/pulang_at disimpan dalam UTC, jadwal dalam waktu lokal server
+    now = datetime.datetime.now()
+    utc_offset = attendance_rollup.local_utc_offset()
+
+    team = {}
+    for row in result:
+        member = team.get(row.id)
+        if member is None:
+            member = team[row.id] = {
+                "id": row.id,
+                "user_name": row.user_name,
+                "full_name": row.full_name,
+                "department": row.department_name,
+                "summary": {"shifts": 0, "hadir": 0, "terlambat": 0, "tidak_hadir": 0, "tanpa_pulang": 0},
+                "shifts": [],
+            }
+        if row.shift_date is None:
+            continue
+
+        shift_start = datetime.datetime.combine(row.shift_date, row.start_time)
+        shift_end = datetime.datetime.combine(row.shift_date, row.end_time)
+        if shift_end <= shift_start:
+            shift_end += datetime.timedelta(days=1)  # shift malam
+        masuk_at = row.masuk_at + utc_offset if row.masuk_at else None
+        pulang_at = row.pulang_at + utc_offset if row.pulang_at else None
+        shift_state, late_minutes, missing_checkout = shift_status(shift_start, shift_end, masuk_at, pulang_at, now)
+
+        summary = member["summary"]
+        summary["shifts"] += 1
+        if shift_state in summary:
+            summary[shift_state] += 1
+        if shift_state == "terlambat":
+            summary["hadir"] += 1
+        summary["tanpa_pulang"] += missing_checkout
+
+        member["shifts"].append({
+            "shift_date": row.shift_date,
+            "start_time": row.start_time,
+            "end_time": row.end_time,
+            "masuk_at": masuk_at,
+            "pulang_at": pulang_at,
+            "status": shift_state,
+            "late_minutes": late_minutes,
+            "missing_checkout": missing_checkout,
+        })
+
+    return {"start_date": start_date, "end_date": end_date, "staff": list(team.values())}
+
+
+@router.get("/reports/monthly")
+async def monthly_report(
+    year: int = Query(...),
+    month: int = Query(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(role_manager_or_admin_required)
+):
+    """Rekap bulanan bawahan dari tabel attendance_monthly (tanpa memindai tabel attendance)."""
+    try:
+        month_start = datetime.date(year, month, 1)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tahun atau bulan tidak valid.")
+    result = await db.execute(attendance_rollup.report_query(month_start).where(User.manager_id == current_user.id))
+    return [attendance_rollup.report_row(row) for row in result]
+
+
 @router.post("/schedules")
 def create_schedule_for_subordinate(
     user_id: int = Form(...),
@@ -84,7 +229,7 @@ def create_schedule_for_subordinate(
     start_time: str = Form(...),
     end_time: str = Form(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(role_manager_or_admin_required)
+    current_user: Principal = Depends(role_manager_or_admin_required)
 ):
     """
     Kepala Ruangan membuat jadwal untuk staff. Format tanggal/time string ISO (YYYY-MM-DD, HH:MM:SS or HH:MM).
@@ -0,0 +1,56 @@
+"""
+Endpoint monitoring per role (lihat APP_ROLE di main.py).
+
+Micro-batcher, quality gate dan histogram latensi hidup di proses yang
+melayani /attendance, jadi `router` hanya di-mount di worker vision (dan
+all); di worker api datanya selalu kosong. Pool koneksi DB juga per proses,
+jadi `pool_router` di-mount di semua role: pool async untuk /attendance
+hanya terlihat dari worker vision.
+"""
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+import metrics
+from database import pool_stats
+from dependencies import role_admin_required
+from embedding_cache import embedding_cache
+from embedding_index import embedding_index
+from face_results import gate_stats
+from inference import face_batcher
+
+router = APIRouter(tags=["monitoring"])
+pool_router = APIRouter(tags=["monitoring"])
+
+
+@router.get("/admin/inference/stats")
+def inference_stats(_=Depends(role_admin_required)):
+    """Statistik micro-batcher verifikasi wajah (fill rate, ukuran batch, antrian), quality gate, cache dan index embedding."""
+    stats = face_batcher.stats()
+    stats["quality_gate"] = gate_stats.stats()
+    stats["embedding_cache"] = embedding_cache.stats()
+    stats["embedding_index"] = embedding_index.stats()
+    return stats
+
+
+def cache_metric_lines():
+    cache = embedding_cache.stats()
+    return (
+        metrics.sample("embedding_cache_hits_total", "Embedding yang diambil dari cache", cache["hits"])
+        + metrics.sample("embedding_cache_misses_total", "Embedding yang dibaca dari DB", cache["misses"])
+        + metrics.sample("embedding_cache_entries", "Jumlah embedding di cache", cache["entries"], "gauge")
+        + metrics.sample("embedding_index_size", "Jumlah embedding di index kiosk", len(embedding_index), "gauge")
+    )
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Histogram latensi per tahap dan statistik cache (format teks Prometheus), per proses worker"""
+    if not metrics.METRICS_ENABLED:
+        return PlainTextResponse("metrics dimatikan (METRICS_ENABLED=0)\n", status_code=404)
+    return PlainTextResponse(metrics.render(cache_metric_lines()), media_type="text/plain; version=0.0.4")
+
+
+@pool_router.get("/admin/db/pool-stats")
+def db_pool_stats(_=Depends(role_admin_required)):
+    """Waktu tunggu checkout koneksi DB, untuk melihat apakah pool (bukan CPU) yang jadi bottleneck."""
+    return pool_stats()
@@ -1,21 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, File, HTTPException, Query, UploadFile
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List
+import csv
 import datetime
+import os
 
-from database import get_db
+from database import get_db, get_async_db
 from models import Schedule, User
+import roster
 from schemas import ScheduleCreate, ScheduleResponse
 from dependencies import role_manager_or_admin_required, get_current_user
+from principal_cache import Principal
 
 router = APIRouter(prefix="/schedules", tags=["schedules"])
 
+ROSTER_MAX_ROWS = int(os.getenv("ROSTER_MAX_ROWS", "5000"))
+ROSTER_INSERT_CHUNK = 500
+
 
 @router.post("/", response_model=ScheduleResponse)
 def create_schedule(
     schedule: ScheduleCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(role_manager_or_admin_required)
+    current_user: Principal = Depends(role_manager_or_admin_required)
 ):
     """
     Membuat jadwal baru untuk seorang staff.
@@ -37,7 +46,7 @@ def create_schedule(
 def get_schedules_for_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Melihat jadwal untuk user tertentu.
@@ -57,12 +66,105 @@ def get_schedules_for_user(
     return schedules
 
 
+async def import_roster(db: AsyncSession, current_user: Principal, raw_rows: List[Dict[str, Any]], dry_run: bool):
+    """
+    Validasi dan simpan roster: izin untuk semua user dicek dalam satu query,
+    duplikat/tumpang tindih dideteksi terhadap jadwal di DB dan sesama baris,
+    baris valid di-insert per chunk dalam satu transaksi.
+    """
+    if current_user.role not in ("admin", "kepala_ruangan"):
+        raise HTTPException(status_code=403, detail="Hanya Admin atau Kepala Ruangan yang bisa mengunggah roster.")
+    if len(raw_rows) > ROSTER_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"Maksimal {ROSTER_MAX_ROWS} baris per upload.")
+
+    rows, errors = roster.parse_rows(raw_rows)
+
+    user_ids = {s.user_id for _, s in rows}
+    result = await db.execute(select(User.id, User.role, User.manager_id).where(User.id.in_(user_ids)))
+    users = {row.id: row for row in result}
+
+    permitted = []
+    for number, s in rows:
+        user = users.get(s.user_id)
+        if user is None or user.role != "staff":
+            errors.append({"row": number, "detail": f"Staff dengan id {s.user_id} tidak ditemukan."})
+        elif current_user.role == "kepala_ruangan" and user.manager_id != current_user.id:
+            errors.append({"row": number, "detail": "Anda hanya bisa membuat jadwal untuk staff Anda."})
+        else:
+            permitted.append((number, s))
+
+    existing = []
+    if permitted:
+        # Satu hari sebelum/sesudah untuk shift malam yang melewati batas tanggal
+        first_date = min(s.shift_date for _, s in permitted) - datetime.timedelta(days=1)
+        last_date = max(s.shift_date for _, s in permitted) + datetime.timedelta(days=1)
+        result = await db.execute(
+            select(Schedule.user_id, Schedule.shift_date, Schedule.start_time, Schedule.end_time).where(
+                Schedule.user_id.in_({s.user_id for _, s in permitted}),
+                Schedule.shift_date >= first_date,
+                Schedule.shift_date <= last_date,
+            )
+        )
+        existing = result.all()
+
+    conflicts = roster.find_conflicts(permitted, existing)
+    errors.extend({"row": number, "detail": detail} for number, detail in conflicts.items())
+    valid = [s.dict() for number, s in permitted if number not in conflicts]
+
+    if valid and not dry_run:
+        for i in range(0, len(valid), ROSTER_INSERT_CHUNK):
+            await db.execute(insert(Schedule), valid[i:i + ROSTER_INSERT_CHUNK])
+        await db.commit()
+
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "total": len(raw_rows),
+        "inserted": 0 if dry_run else len(valid),
+        "valid": len(valid),
+        "dry_run": dry_run,
+        "errors": errors,
+    }
+
+
+@router.post("/bulk")
+async def upload_roster(
+    schedules: List[Dict[str, Any]] = Body(..., embed=True),
+    dry_run: bool = Query(False),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(role_manager_or_admin_required)
+):
+    """
+    Unggah roster sekaligus (JSON: {"schedules": [{user_id, shift_date, start_time, end_time}, ...]}).
+    Baris yang tidak valid dilaporkan per nomor baris; baris valid tetap disimpan.
+    dry_run=true hanya memvalidasi.
+    """
+    return await import_roster(db, current_user, schedules, dry_run)
+
+
+@router.post("/bulk/csv")
+async def upload_roster_csv(
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(role_manager_or_admin_required)
+):
+    """
+    Unggah roster dari CSV dengan header user_id,shift_date,start_time,end_time
+    (YYYY-MM-DD, HH:MM). Nomor baris pada laporan error tidak termasuk header.
+    """
+    try:
+        raw_rows = roster.read_csv(await file.read())
+    except (UnicodeDecodeError, ValueError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"CSV tidak valid: {e}")
+    return await import_roster(db, current_user, raw_rows, dry_run)
+
+
 # Endpoint untuk backward compatibility (untuk manager/admin)
 @router.get("/{user_id}", response_model=List[ScheduleResponse])
 def get_schedules_admin(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(role_manager_or_admin_required)
+    current_user: Principal = Depends(role_manager_or_admin_required)
 ):
     """
     Endpoint khusus untuk manager/admin melihat jadwal staff.
@@ -1,11 +1,16 @@
 import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import or_, select
 from sqlalchemy.orm import Session
 
 from database import get_db
 from models import ShiftSwapRequest, Schedule, User
 from schemas import SwapRequestCreate, SwapRequestResponse
 from dependencies import get_current_user, role_manager_or_admin_required
+from principal_cache import Principal
+from pagination import PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT, paginate, page_rows
 
 router = APIRouter(prefix="/swap-requests", tags=["swap_requests"])
 
@@ -14,7 +19,7 @@ router = APIRouter(prefix="/swap-requests", tags=["swap_requests"])
 def create_swap_request(
     request_data: SwapRequestCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     if current_user.id == request_data.requested_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Anda tidak bisa tukar jadwal dengan diri sendiri.")
@@ -43,7 +48,7 @@ def create_swap_request(
 def approve_swap_request(
     request_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(role_manager_or_admin_required)
+    current_user: Principal = Depends(role_manager_or_admin_required)
 ):
     swap_request = db.query(ShiftSwapRequest).filter(ShiftSwapRequest.id == request_id).first()
     if not swap_request:
@@ -69,7 +74,7 @@ def approve_swap_request(
 def reject_swap_request(
     request_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(role_manager_or_admin_required)
+    current_user: Principal = Depends(role_manager_or_admin_required)
 ):
     """
     Reject a swap request (manager or admin).
@@ -85,25 +90,28 @@ def reject_swap_request(
 
 @router.get("/pending/manager")
 def get_pending_for_manager(
+    response: Response,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1, le=PAGE_MAX_LIMIT),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     List semua permintaan tukar yang statusnya 'pending_manager' dan
     melibatkan staff yang dikelola oleh current_user (sebagai manager).
     Manager akan melihat permintaan di mana requester_id atau requested_id
-    adalah subordinate mereka.
+    adalah subordinate mereka. Per halaman, lihat header X-Next-Cursor.
     """
-    subordinates = db.query(User.id).filter(User.manager_id == current_user.id).all()
-    subordinate_ids = [s.id for s in subordinates]
-
-    if not subordinate_ids:
-        return []
-
-    pending = db.query(ShiftSwapRequest).filter(
+    subordinate_ids = select(User.id).where(User.manager_id == current_user.id)
+    query = select(
+        ShiftSwapRequest.id, ShiftSwapRequest.requester_id, ShiftSwapRequest.requested_id,
+        ShiftSwapRequest.requester_schedule_id, ShiftSwapRequest.requested_schedule_id,
+        ShiftSwapRequest.status, ShiftSwapRequest.created_at,
+    ).where(
         ShiftSwapRequest.status == 'pending_manager',
-        ((ShiftSwapRequest.requester_id.in_(subordinate_ids)) | (ShiftSwapRequest.requested_id.in_(subordinate_ids)))
-    ).all()
+        or_(ShiftSwapRequest.requester_id.in_(subordinate_ids), ShiftSwapRequest.requested_id.in_(subordinate_ids))
+    )
+    pending = page_rows(db.execute(paginate(query, ShiftSwapRequest.id, cursor, limit)), limit, response)
 
     result = []
     for r in pending:
@@ -2,13 +2,13 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from database import get_db
-from models import User
 from dependencies import get_current_user
+from principal_cache import Principal
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get("/me")
-def get_current_user_info(current_user: User = Depends(get_current_user)):
+def get_current_user_info(current_user: Principal = Depends(get_current_user)):
     """
     Endpoint untuk mendapatkan informasi user yang sedang login
     """
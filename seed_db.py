@@ -1,33 +1,113 @@
 # seed_db.py
 import json
-from sqlalchemy import create_engine
+import os
+import sys
+import numpy as np
+from sqlalchemy import create_engine, update
 from sqlalchemy.orm import sessionmaker
 # Pastikan main.py sudah diupdate ke versi MySQL
 from database import DATABASE_URL
-from models import User 
+from models import User
+from embedding_cache import embedding_update_values
+import embedding_store
 
-def seed_data():
+EMBEDDINGS_FILE = "face_embeddings.bin"
+LEGACY_JSON_FILE = "face_embeddings.json"
+# Posisi record terakhir yang sudah di-seed, agar seeding berikutnya hanya membaca record baru
+SEED_MARKER_FILE = EMBEDDINGS_FILE + ".seeded"
+SYNC_CHUNK_SIZE = 500
+# Embedding dianggap sama jika selisih tiap elemen di bawah ini (float32 vs float64 JSON)
+EMBEDDING_ATOL = 1e-6
+
+
+def _read_marker():
+    """Return jumlah record yang sudah di-seed, atau 0 jika file embedding sudah diganti (compact)"""
+    if not os.path.exists(SEED_MARKER_FILE):
+        return 0
+    with open(SEED_MARKER_FILE, 'r') as f:
+        marker = json.load(f)
+    if marker.get("inode") != os.stat(EMBEDDINGS_FILE).st_ino:
+        return 0
+    return marker.get("records", 0)
+
+
+def _write_marker(records):
+    with open(SEED_MARKER_FILE, 'w') as f:
+        json.dump({"inode": os.stat(EMBEDDINGS_FILE).st_ino, "records": records}, f)
+
+
+def load_embeddings(full=False):
+    """
+    Return (nama -> embedding, jumlah record total).
+    Tanpa full, hanya record yang ditambahkan sejak seeding terakhir yang dibaca.
+    """
+    if not os.path.exists(EMBEDDINGS_FILE):
+        with open(LEGACY_JSON_FILE, 'r') as f:
+            return json.load(f), None
+
+    start = 0 if full else _read_marker()
+    total = embedding_store.count_records(EMBEDDINGS_FILE)
+    records = embedding_store.load_records(EMBEDDINGS_FILE, start)
+    return embedding_store.latest_by_name(records), total
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _is_unchanged(stored, embedding):
+    return stored is not None and len(stored) == len(embedding) and np.allclose(stored, embedding, atol=EMBEDDING_ATOL)
+
+
+def seed_data(full=False):
     engine = create_engine(DATABASE_URL)
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     db = SessionLocal()
 
-    with open('face_embeddings.json', 'r') as f:
-        data = json.load(f)
+    data, total = load_embeddings(full)
+    if not data:
+        print("Tidak ada embedding baru sejak seeding terakhir.")
+
+    # 1 query per chunk nama untuk mengambil semua user yang cocok sekaligus
+    names = list(data.keys())
+    existing = {}
+    for chunk in _chunks(names, SYNC_CHUNK_SIZE):
+        rows = db.query(User.id, User.user_name, User.embedding, User.embedding_version).filter(
+            User.user_name.in_(chunk)
+        ).all()
+        existing.update({row.user_name: row for row in rows})
+
+    # Diff terhadap embedding yang tersimpan; baris yang sama dilewati
+    updates = []
+    unchanged = 0
+    missing = [name for name in names if name not in existing]
+    for user_name, row in existing.items():
+        embedding = data[user_name]
+        if _is_unchanged(row.embedding, embedding):
+            unchanged += 1
+            continue
+        updates.append(embedding_update_values(row.id, row.embedding_version, embedding))
+
+    for user_name in missing:
+        # Skip jika user_name tidak ada di DB
+        print(f"User {user_name} tidak ditemukan di DB, dilewati.")
 
-    for user_name, embedding in data.items():
-        existing_user = db.query(User).filter(User.user_name == user_name).first()
-        if existing_user:
-            # Update embedding jika user_name cocok
-            existing_user.embedding = embedding
-            print(f"Update embedding untuk user: {user_name}")
-        else:
-            # Skip jika user_name tidak ada di DB
-            print(f"User {user_name} tidak ditemukan di DB, dilewati.")
+    # Bulk UPDATE by primary key (executemany) per chunk, satu transaksi
+    written = 0
+    for chunk in _chunks(updates, SYNC_CHUNK_SIZE):
+        db.execute(update(User), chunk)
+        written += len(chunk)
+        print(f"Update embedding: {written}/{len(updates)}")
 
-    
     db.commit()
     db.close()
-    print("Proses seeding ke MySQL selesai.")
+    if total is not None:
+        _write_marker(total)
+    print(
+        f"Proses seeding ke MySQL selesai. {len(names)} embedding dibaca, {len(updates)} diupdate, "
+        f"{unchanged} tidak berubah, {len(missing)} user tidak ditemukan."
+    )
 
 if __name__ == "__main__":
-    seed_data()
\ No newline at end of file
+    seed_data(full="--full" in sys.argv[1:])
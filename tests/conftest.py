@@ -0,0 +1,66 @@
+"""
+Test berjalan terhadap SQLite (bukan MySQL produksi). Env diset sebelum
+modul aplikasi di-import, karena database.py membaca URL saat import.
+"""
+import datetime
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(ROOT, ".pytest_cache", "test.db"))
+os.environ.setdefault("ASYNC_DATABASE_URL", os.environ["DATABASE_URL"].replace("sqlite://", "sqlite+aiosqlite://"))
+os.makedirs(os.path.join(ROOT, ".pytest_cache"), exist_ok=True)
+
+
+@pytest.fixture
+def seeded_db():
+    """
+    Skema baru di SQLite + satu lokasi, departemen, kepala ruangan dan staff
+    (dengan embedding dan jadwal hari ini yang sedang berjalan).
+    """
+    from auth import create_access_token
+    from database import Base, SessionLocal, engine
+    from embedding_cache import embedding_cache, set_user_embedding
+    from models import Department, OfficeLocation, Schedule, User
+    from principal_cache import principal_cache
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    principal_cache.clear()
+    embedding_cache.clear()
+
+    now = datetime.datetime.now()
+    with SessionLocal() as db:
+        location = OfficeLocation(location_name="RSUD", latitude=-0.5, longitude=101.4, radius_meters=200)
+        department = Department(name="IGD")
+        db.add_all([location, department])
+        db.flush()
+        head = User(user_name="kepala", password="x", full_name="Kepala", role="kepala_ruangan",
+                    department_id=department.id, location_id=location.id)
+        db.add(head)
+        db.flush()
+        staff = User(user_name="staff", password="x", full_name="Staff Satu", role="staff",
+                     department_id=department.id, manager_id=head.id, location_id=location.id)
+        db.add(staff)
+        db.flush()
+        set_user_embedding(staff, np.full(128, 0.1, dtype=np.float32))
+        db.add(Schedule(
+            user_id=staff.id, shift_date=now.date(),
+            start_time=now.time().replace(microsecond=0),
+            end_time=(now + datetime.timedelta(hours=8)).time().replace(microsecond=0),
+        ))
+        db.commit()
+        ids = {"head": head.id, "staff": staff.id, "location": location.id, "department": department.id}
+
+    ids["tokens"] = {
+        "head": create_access_token({"sub": "kepala"}),
+        "staff": create_access_token({"sub": "staff"}),
+    }
+    ids["form"] = {"attendance_type": "masuk", "latitude": "-0.5", "longitude": "101.4"}
+    return ids
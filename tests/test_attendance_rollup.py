@@ -0,0 +1,52 @@
+import datetime
+
+from sqlalchemy import event, select
+
+import attendance_rollup
+from database import SessionLocal, engine
+from models import AttendanceDay, AttendanceMonthly
+
+
+def _day(user_id, work_date, hours=8):
+    masuk_at = datetime.datetime.combine(work_date, datetime.time(1))
+    return AttendanceDay(user_id=user_id, work_date=work_date, masuk_at=masuk_at,
+                         pulang_at=masuk_at + datetime.timedelta(hours=hours) if hours else None)
+
+
+def test_rebuild_recomputes_each_month(seeded_db, monkeypatch):
+    monkeypatch.setattr(attendance_rollup, "local_utc_offset", lambda: datetime.timedelta(0))
+    staff = seeded_db["staff"]
+    with SessionLocal() as db:
+        db.add_all([
+            _day(staff, datetime.date(2026, 1, 30)),
+            _day(staff, datetime.date(2026, 2, 2), hours=None),
+            _day(staff, datetime.date(2026, 2, 3)),
+        ])
+        # Rekap basi (terhitung dua kali) dan bulan tanpa attendance_days lagi
+        db.add(AttendanceMonthly(user_id=staff, month_start=datetime.date(2026, 2, 1), days_worked=4,
+                                 late_count=0, worked_minutes=960, missing_checkouts=0))
+        db.add(AttendanceMonthly(user_id=staff, month_start=datetime.date(2026, 4, 1), days_worked=1,
+                                 late_count=0, worked_minutes=60, missing_checkouts=0))
+        db.commit()
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            assert attendance_rollup.rebuild(db) == 2
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        rows = db.execute(
+            select(AttendanceMonthly.month_start, AttendanceMonthly.days_worked,
+                   AttendanceMonthly.worked_minutes, AttendanceMonthly.missing_checkouts)
+            .order_by(AttendanceMonthly.month_start)
+        ).all()
+
+    assert [tuple(row) for row in rows] == [
+        (datetime.date(2026, 1, 1), 1, 480, 0),
+        (datetime.date(2026, 2, 1), 2, 480, 1),
+    ]
+    # Satu kunci attendance_days per bulan (Jan..Apr), masing-masing di transaksinya sendiri
+    assert sum("attendance_days.id" in s and "GROUP BY" not in s for s in statements) == 4
+
@@ -0,0 +1,81 @@
+import asyncio
+
+import numpy as np
+from sqlalchemy import update
+
+from database import AsyncSessionLocal, async_engine
+from embedding_index import EmbeddingIndex
+from models import User
+
+
+class _ClearAfterFirstQuery:
+    """Session yang mengubah embedding user di DB tepat setelah query pertama"""
+
+    def __init__(self, db, user_id, **values):
+        self.db = db
+        self.user_id = user_id
+        self.values = values
+        self.calls = 0
+
+    async def execute(self, statement):
+        result = await self.db.execute(statement)
+        self.calls += 1
+        if self.calls == 1:
+            # Lewat session yang sama: di SQLite penulis lain terkunci selama transaksi baca
+            await self.db.execute(update(User).where(User.id == self.user_id).values(
+                embedding_version=User.embedding_version + 1, **self.values
+            ))
+        return result
+
+
+def _run(coro):
+    async def run():
+        try:
+            return await coro
+        finally:
+            # Koneksi aiosqlite terikat ke event loop ini; tutup sebelum loop selesai
+            await async_engine.dispose()
+
+    return asyncio.run(run())
+
+
+def _refresh_racing(index, user_id, **values):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            await index.refresh(_ClearAfterFirstQuery(db, user_id, **values))
+
+    _run(run())
+
+
+def test_refresh_skips_embedding_cleared_between_queries(seeded_db):
+    index = EmbeddingIndex()
+    _refresh_racing(index, seeded_db["staff"], embedding=None, embedding_norm=None)
+    assert len(index) == 0
+    assert index.search(np.zeros(128)) == []
+
+
+def test_refresh_skips_embedding_from_other_model(seeded_db):
+    index = EmbeddingIndex()
+    _refresh_racing(index, seeded_db["staff"], embedding_model="model-lain")
+    assert len(index) == 0
+
+
+def test_concurrent_stale_requests_refresh_once(seeded_db):
+    index = EmbeddingIndex()
+    calls = []
+    refresh = index.refresh
+
+    async def counting_refresh(db):
+        calls.append(db)
+        await asyncio.sleep(0.01)
+        return await refresh(db)
+
+    index.refresh = counting_refresh
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            await asyncio.gather(*(index.refresh_if_stale(db) for _ in range(5)))
+
+    _run(run())
+    assert len(calls) == 1
+    assert [user_id for user_id, _ in index.search(np.full(128, 0.1))] == [seeded_db["staff"]]
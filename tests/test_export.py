@@ -0,0 +1,86 @@
+import datetime
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+
+import attendance_rollup
+import main
+from database import SessionLocal
+from models import Attendance, AttendanceDay, Schedule
+from routes import export
+from routes.export import export_query
+
+UTC_OFFSET = datetime.timedelta(hours=7)
+DAY = datetime.date(2026, 3, 10)
+
+
+def _add_shift(db, user_id, work_date, masuk_local, pulang_local):
+    masuk_at = masuk_local - UTC_OFFSET
+    pulang_at = pulang_local - UTC_OFFSET
+    db.add(Schedule(user_id=user_id, shift_date=work_date,
+                    start_time=masuk_local.time(), end_time=pulang_local.time()))
+    db.add(AttendanceDay(user_id=user_id, work_date=work_date, masuk_at=masuk_at, pulang_at=pulang_at))
+    db.add(Attendance(user_id=user_id, attendance_type="masuk", timestamp=masuk_at, latitude=-0.5, longitude=101.4))
+    db.add(Attendance(user_id=user_id, attendance_type="pulang", timestamp=pulang_at, latitude=-0.5, longitude=101.4))
+
+
+def test_export_uses_local_dates(seeded_db, monkeypatch):
+    monkeypatch.setattr(attendance_rollup, "local_utc_offset", lambda: UTC_OFFSET)
+    staff = seeded_db["staff"]
+    at = datetime.datetime.combine
+    with SessionLocal() as db:
+        # Shift pagi: masuk 05:00 lokal = hari sebelumnya dalam UTC
+        _add_shift(db, staff, DAY, at(DAY, datetime.time(5)), at(DAY, datetime.time(13)))
+        # Shift malam hari berikutnya: seluruhnya di luar rentang
+        next_day = DAY + datetime.timedelta(days=1)
+        _add_shift(db, staff, next_day, at(next_day, datetime.time(22)),
+                   at(next_day + datetime.timedelta(days=1), datetime.time(6)))
+        db.commit()
+
+        rows = db.execute(export_query(DAY, DAY, None, None)).all()
+
+    assert [(row.attendance_type, row.shift_date) for row in rows] == [("masuk", DAY), ("pulang", DAY)]
+    assert rows[0].shift_start == datetime.time(5)
+
+
+def test_export_night_shift_checkout_keeps_its_schedule(seeded_db, monkeypatch):
+    monkeypatch.setattr(attendance_rollup, "local_utc_offset", lambda: UTC_OFFSET)
+    staff = seeded_db["staff"]
+    next_day = DAY + datetime.timedelta(days=1)
+    with SessionLocal() as db:
+        _add_shift(db, staff, DAY, datetime.datetime.combine(DAY, datetime.time(22)),
+                   datetime.datetime.combine(next_day, datetime.time(6)))
+        db.commit()
+
+        rows = db.execute(export_query(DAY, next_day, None, None)).all()
+
+    assert [(row.attendance_type, row.shift_date) for row in rows] == [("masuk", DAY), ("pulang", DAY)]
+
+
+def _export(client, seeded_db, fmt):
+    return client.get(
+        "/export/attendance",
+        params={"start_date": str(DAY), "end_date": str(DAY), "format": fmt},
+        headers={"Authorization": f"Bearer {seeded_db['tokens']['head']}"},
+    )
+
+
+def test_export_parquet(seeded_db):
+    pq = pytest.importorskip("pyarrow.parquet")
+    with SessionLocal() as db:
+        _add_shift(db, seeded_db["staff"], DAY, datetime.datetime.combine(DAY, datetime.time(8)),
+                   datetime.datetime.combine(DAY, datetime.time(16)))
+        db.commit()
+
+    response = _export(TestClient(main.app), seeded_db, "parquet")
+    assert response.status_code == 200, response.text
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.column("attendance_type").to_pylist() == ["masuk", "pulang"]
+
+
+def test_export_parquet_without_pyarrow(seeded_db, monkeypatch):
+    monkeypatch.setattr(export, "pq", None)
+    response = _export(TestClient(main.app), seeded_db, "parquet")
+    assert response.status_code == 400
+    assert "pyarrow" in response.json()["detail"]
@@ -0,0 +1,38 @@
+import cv2
+import numpy as np
+import pytest
+
+face_pipeline = pytest.importorskip("face_pipeline", exc_type=ImportError)
+
+
+def _jpeg(width=64, height=48):
+    image = np.full((height, width, 3), 128, dtype=np.uint8)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+def test_encode_faces_isolates_bad_items():
+    batch = [b"garbage", b"", _jpeg(), b"more garbage"]
+    results = face_pipeline.encode_faces(batch)
+
+    assert len(results) == len(batch)
+    assert results[0][0] == face_pipeline.STATUS_INVALID_IMAGE
+    assert results[1][0] == face_pipeline.STATUS_INVALID_IMAGE
+    assert results[3][0] == face_pipeline.STATUS_INVALID_IMAGE
+    # Gambar valid tetap diproses walaupun batch-mate-nya rusak
+    assert results[2][0] != face_pipeline.STATUS_INVALID_IMAGE
+
+
+def test_encode_faces_turns_exceptions_into_invalid_image(monkeypatch):
+    real_encode_face = face_pipeline.encode_face
+
+    def flaky(contents, **kwargs):
+        if contents == b"boom":
+            raise cv2.error("decode gagal")
+        return real_encode_face(contents, **kwargs)
+
+    monkeypatch.setattr(face_pipeline, "encode_face", flaky)
+    results = face_pipeline.encode_faces([b"boom", _jpeg()])
+
+    assert results[0][0] == face_pipeline.STATUS_INVALID_IMAGE
+    assert "error" in results[0][2]
+    assert results[1][0] != face_pipeline.STATUS_INVALID_IMAGE
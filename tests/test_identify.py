@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from routes import attendance
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+def _post(client, key=None):
+    headers = {"X-Kiosk-Key": key} if key is not None else {}
+    return client.post("/attendance/identify", files={"file": ("a.jpg", b"jpeg", "image/jpeg")}, headers=headers)
+
+
+def test_identify_disabled_without_kiosk_key(client, monkeypatch):
+    monkeypatch.setattr(attendance, "KIOSK_API_KEY", None)
+    assert _post(client).status_code == 503
+    assert _post(client, "apa saja").status_code == 503
+
+
+def test_identify_rejects_wrong_key(client, monkeypatch):
+    monkeypatch.setattr(attendance, "KIOSK_API_KEY", "rahasia")
+    assert _post(client).status_code == 401
+    assert _post(client, "salah").status_code == 401
+
+
+def test_identify_no_match_does_not_leak_candidates(client, monkeypatch):
+    monkeypatch.setattr(attendance, "KIOSK_API_KEY", "rahasia")
+
+    async def fake_encode(file):
+        return np.zeros(128, dtype=np.float32)
+
+    async def fake_refresh(db):
+        pass
+
+    monkeypatch.setattr(attendance, "encode_uploaded_face", fake_encode)
+    monkeypatch.setattr(attendance.embedding_index, "refresh_if_stale", fake_refresh)
+    monkeypatch.setattr(attendance.embedding_index, "search", lambda embedding, k=1: [(7, 0.9)])
+
+    response = _post(client, "rahasia")
+    assert response.status_code == 200
+    assert response.json() == {"status": "no_match"}
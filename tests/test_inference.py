@@ -0,0 +1,65 @@
+import asyncio
+import os
+import time
+
+from inference import InferenceEngine, MicroBatcher
+
+
+def record_pid(batch):
+    time.sleep(0.2)
+    return [(item, os.getpid()) for item in batch]
+
+
+def fail_on_bad(batch):
+    if "bad" in batch:
+        raise ValueError("bad item")
+    return list(batch)
+
+
+def _run(batcher, items):
+    async def main():
+        return await asyncio.gather(*(batcher.submit(item) for item in items), return_exceptions=True)
+
+    try:
+        return asyncio.run(main())
+    finally:
+        batcher.engine.shutdown()
+
+
+def test_batch_is_split_across_workers():
+    engine = InferenceEngine(workers=2, queue_size=16, timeout=30, initializer=None)
+    batcher = MicroBatcher(engine, record_pid, max_batch_size=8, max_wait_ms=50)
+
+    results = _run(batcher, list(range(8)))
+
+    assert [item for item, _ in results] == list(range(8))
+    assert len({pid for _, pid in results}) == 2
+    assert batcher.batches_total == 1
+
+
+def test_failing_slice_does_not_fail_other_slices():
+    engine = InferenceEngine(workers=2, queue_size=16, timeout=30, initializer=None)
+    batcher = MicroBatcher(engine, fail_on_bad, max_batch_size=4, max_wait_ms=50)
+
+    results = _run(batcher, ["a", "bad", "c", "d"])
+
+    assert isinstance(results[0], ValueError) and isinstance(results[1], ValueError)
+    assert results[2:] == ["c", "d"]
+
+
+def test_crashed_batch_fails_callers_and_is_logged(caplog):
+    engine = InferenceEngine(workers=1, queue_size=16, timeout=30, initializer=None)
+    batcher = MicroBatcher(engine, record_pid, max_batch_size=2, max_wait_ms=50)
+    held = []
+
+    async def crash(batch):
+        held.append(len(batcher._tasks))
+        raise RuntimeError("crash")
+
+    batcher._run_batch = crash
+    results = _run(batcher, ["a", "b"])
+
+    assert held == [1]
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert not batcher._tasks
+    assert "Micro-batch 2 item gagal" in caplog.text
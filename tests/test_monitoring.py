@@ -0,0 +1,44 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from auth import create_access_token
+from database import SessionLocal
+from models import User
+
+
+@pytest.fixture
+def admin_headers(seeded_db):
+    with SessionLocal() as db:
+        db.add(User(user_name="admin", password="x", full_name="Admin", role="admin"))
+        db.commit()
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+
+
+def test_embedding_cache_stats_exposed(seeded_db, admin_headers):
+    client = TestClient(main.app)
+    staff_headers = {"Authorization": f"Bearer {seeded_db['tokens']['staff']}"}
+    for _ in range(2):
+        response = client.post("/attendance/check-requirements", data=seeded_db["form"], headers=staff_headers)
+        assert response.status_code == 200, response.text
+
+    stats = client.get("/admin/inference/stats", headers=admin_headers).json()["embedding_cache"]
+    assert stats["misses"] >= 1 and stats["hits"] >= 1
+
+    body = client.get("/metrics").text
+    assert f"embedding_cache_hits_total {stats['hits']}" in body
+    assert "# TYPE embedding_cache_entries gauge" in body
+
+
+def test_embedding_index_stats_exposed(seeded_db, admin_headers, monkeypatch):
+    from embedding_index import EmbeddingIndex
+    from routes import monitoring
+
+    index = EmbeddingIndex()
+    index._set_row(seeded_db["staff"], 1, [0.1] * 128)
+    monkeypatch.setattr(monitoring, "embedding_index", index)
+    client = TestClient(main.app)
+
+    stats = client.get("/admin/inference/stats", headers=admin_headers).json()["embedding_index"]
+    assert stats["size"] == 1
+    assert "embedding_index_size 1" in client.get("/metrics").text
@@ -0,0 +1,42 @@
+import asyncio
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main
+from database import AsyncSessionLocal, SessionLocal
+from embedding_cache import embedding_update_values
+from models import User
+from principal_cache import principal_cache
+from routes.attendance import evaluate_requirements
+
+
+def test_reenrollment_applies_while_principal_is_cached(seeded_db):
+    client = TestClient(main.app)
+    headers = {"Authorization": f"Bearer {seeded_db['tokens']['staff']}"}
+    response = client.post("/attendance/check-requirements", data=seeded_db["form"], headers=headers)
+    assert response.status_code == 200, response.text
+
+    # Registrasi ulang dari proses lain: versi naik di DB, principal masih di cache
+    new_embedding = np.full(128, 0.7, dtype=np.float32)
+    with SessionLocal() as db:
+        user = db.get(User, seeded_db["staff"])
+        values = embedding_update_values(user.id, user.embedding_version, new_embedding)
+        db.query(User).filter(User.id == user.id).update({
+            User.embedding: values["embedding"],
+            User.embedding_model: values["embedding_model"],
+            User.embedding_norm: values["embedding_norm"],
+            User.embedding_version: values["embedding_version"],
+        })
+        db.commit()
+
+    async def evaluate():
+        async with AsyncSessionLocal() as db:
+            principal = await principal_cache.get(db, "staff")
+            _, known = await evaluate_requirements(db, principal, "masuk", -0.5, 101.4)
+            return known
+
+    hits = principal_cache.hits
+    known = asyncio.run(evaluate())
+    assert principal_cache.hits == hits + 1
+    np.testing.assert_allclose(known, new_embedding)
@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MONITORING_PATHS = {"/admin/inference/stats", "/metrics"}
+
+
+@pytest.mark.parametrize("role, mounted", [("api", False), ("vision", True), ("all", True)])
+def test_monitoring_served_by_vision_role(role, mounted):
+    # APP_ROLE dibaca saat main di-import, jadi setiap role di proses sendiri
+    output = subprocess.run(
+        [sys.executable, "-c", "import main; print('\\n'.join(r.path for r in main.app.routes))"],
+        cwd=ROOT, env=dict(os.environ, APP_ROLE=role), capture_output=True, text=True, check=True,
+    ).stdout.split()
+    assert MONITORING_PATHS.issubset(output) == mounted
+    assert ("/admin/heads" in output) == (role != "vision")
+    assert "/admin/db/pool-stats" in output
@@ -0,0 +1,43 @@
+import datetime
+from types import SimpleNamespace
+
+import roster
+from schemas import ScheduleCreate
+
+DAY = datetime.date(2026, 3, 10)
+
+
+def _row(number, start, end, day=DAY, user_id=1):
+    return number, ScheduleCreate(user_id=user_id, shift_date=day, start_time=start, end_time=end)
+
+
+def _existing(start, end, day=DAY, user_id=1):
+    return SimpleNamespace(user_id=user_id, shift_date=day, start_time=start, end_time=end)
+
+
+def test_upload_row_covering_existing_shift_is_rejected():
+    rows = [_row(1, datetime.time(8), datetime.time(16))]
+    existing = [_existing(datetime.time(10), datetime.time(12))]
+    conflicts = roster.find_conflicts(rows, existing)
+    assert list(conflicts) == [1]
+    assert "jadwal yang sudah ada" in conflicts[1]
+
+
+def test_rejected_row_does_not_block_later_rows():
+    rows = [
+        _row(1, datetime.time(8), datetime.time(16)),
+        _row(2, datetime.time(14), datetime.time(18)),
+    ]
+    existing = [_existing(datetime.time(10), datetime.time(12))]
+    assert list(roster.find_conflicts(rows, existing)) == [1]
+
+
+def test_overlap_between_upload_rows_and_night_shift():
+    rows = [
+        _row(1, datetime.time(22), datetime.time(6)),
+        _row(2, datetime.time(5), datetime.time(13), day=DAY + datetime.timedelta(days=1)),
+        _row(3, datetime.time(6), datetime.time(14), day=DAY + datetime.timedelta(days=1), user_id=2),
+    ]
+    conflicts = roster.find_conflicts(rows, [])
+    assert list(conflicts) == [2]
+    assert "baris 1" in conflicts[2]
@@ -0,0 +1,62 @@
+"""
+Jumlah statement SQL per endpoint (header X-DB-Statements) tidak boleh
+melewati STATEMENT_BUDGETS. Principal cache dikosongkan oleh seeded_db, jadi
+setiap request pertama juga menghitung lookup principal (cache miss).
+"""
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from query_profiles import STATEMENT_BUDGETS
+from routes import attendance
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+def _statements(response):
+    assert "X-DB-Statements" in response.headers, response.text
+    return int(response.headers["X-DB-Statements"])
+
+
+def _headers(seeded_db, who):
+    return {"Authorization": f"Bearer {seeded_db['tokens'][who]}"}
+
+
+def test_check_requirements_within_budget(client, seeded_db):
+    response = client.post(
+        "/attendance/check-requirements", data=seeded_db["form"], headers=_headers(seeded_db, "staff")
+    )
+    assert response.status_code == 200, response.text
+    assert _statements(response) <= STATEMENT_BUDGETS["/attendance/check-requirements"]
+
+
+def test_submit_within_budget(client, seeded_db, monkeypatch):
+    # Pencatatan absensi memakai upsert MySQL, jadi di SQLite submit diuji
+    # sampai verifikasi wajah (wajah tidak cocok -> 401, tanpa commit)
+    async def fake_encode(file):
+        return np.full(128, 0.9, dtype=np.float32)
+
+    monkeypatch.setattr(attendance, "encode_uploaded_face", fake_encode)
+    response = client.post(
+        "/attendance/submit",
+        data=seeded_db["form"],
+        files={"file": ("a.jpg", b"jpeg", "image/jpeg")},
+        headers=_headers(seeded_db, "staff"),
+    )
+    assert response.status_code == 401, response.text
+    assert _statements(response) <= STATEMENT_BUDGETS["/attendance/submit"]
+
+
+@pytest.mark.parametrize("path", [
+    "/manager/subordinates",
+    "/manager/dashboard",
+    "/manager/subordinates/{user_id}/attendances",
+])
+def test_manager_endpoints_within_budget(client, seeded_db, path):
+    response = client.get(path.format(user_id=seeded_db["staff"]), headers=_headers(seeded_db, "head"))
+    assert response.status_code == 200, response.text
+    assert _statements(response) <= STATEMENT_BUDGETS[path]
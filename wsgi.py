@@ -1,13 +1,17 @@
+"""
+Entry point produksi. app adalah aplikasi ASGI dan dijalankan langsung oleh
+worker uvicorn di bawah gunicorn (lihat gunicorn.conf.py):
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+"""
 import sys
 import os
 
 # Path ke folder project
-path = '/home/jazaniest07/absensi'
+path = os.path.dirname(os.path.abspath(__file__))
 if path not in sys.path:
     sys.path.append(path)
 
 from main import app  # app = FastAPI instance
 
-# Gunakan WSGI adaptor
-from fastapi.middleware.wsgi import WSGIMiddleware
-application = WSGIMiddleware(app)
+application = app